@@ -1,14 +1,15 @@
 """Actor-Critic Agent"""
 
-import random
-from collections import defaultdict
+from typing import Iterator
 
 import numpy as np
 import utils
+from agent import TabularAgent
 from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
 
 
-class ActorCriticAgent:
+class ActorCriticAgent(TabularAgent):
     """Actor-Critic agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -19,6 +20,7 @@ class ActorCriticAgent:
         gamma: float = 0.99,
         max_steps: int = 100,
         max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._alpha_critic = alpha_critic
@@ -26,81 +28,79 @@ class ActorCriticAgent:
         self._gamma = gamma
         self._max_steps = max_steps
         self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
 
         # Critic: state-value function V(s)
-        self._values: dict[State, float] = {}
+        self._values = np.zeros(env.num_states)
         # Actor: action preferences h(s,a) — softmax over these gives π(a|s)
-        self._preferences: dict[State, dict[Action, float]] = defaultdict(lambda: defaultdict(float))
+        self._preferences = np.zeros((env.num_states, len(env.actions)))
+        # Softmax cache π(·|s), a row is refreshed when preferences of the state change
+        self._probabilities = utils.softmax(self._preferences)
 
-    def train(self) -> int:
-        """Trains agent."""
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
 
-        iters = 0
+        iters = updates = 0
+
+        env_step, terminals = self._env.step, self._env.terminal_mask
 
         for _ in range(self._max_iters):
-            state = self._get_start_state()
+            state, _ = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
             I = 1.0
 
-            for i in range(self._max_steps):
-                if self._env.is_terminal(state):
+            for _ in range(self._max_steps):
+                if terminals[state]:
                     break
 
-                policy = self._softmax_policy(state)
-                action = utils.get_action(policy)
+                policy = self._probabilities[state]
+                action = utils.sample_action(policy)
 
-                next_state = self._env.next_state(state, action)
-                reward = self._env.reward(state, action, next_state)
+                next_state, reward = env_step(state, action)
+                episode_return += reward
 
                 # TD error: δ ← R + γ·V(Sₜ₊₁) - V(Sₜ)  (V(Sₜ₊₁) = 0 if Sₜ₊₁ is terminal)
-                v_next = 0.0 if self._env.is_terminal(next_state) else self._values.get(next_state, 0.0)
-                td_error = reward + self._gamma * v_next - self._values.get(state, 0.0)
+                v_next = 0.0 if terminals[next_state] else self._values[next_state]
+                td_error = reward + self._gamma * v_next - self._values[state]
 
                 # Critic update: w ← w + αʷ · δ · ∇v̂(Sₜ, w)
-                self._values[state] = self._values.get(state, 0.0) + self._alpha_critic * td_error
+                self._values[state] += self._alpha_critic * td_error
 
                 # Actor update: θ ← θ + αᶿ · I · δ · ∇ln π(Aₜ|Sₜ, θ)
                 # Full softmax gradient: ∂ln π(Aₜ|s)/∂h(s,a) = 1{a=Aₜ} - π(a|s)
-                for a in self._env.actions:
-                    grad = (1.0 if a == action else 0.0) - policy[a]
-                    self._preferences[state][a] += self._alpha_actor * I * td_error * grad
+                grad = -policy
+                grad[action] += 1.0
+                self._preferences[state] += self._alpha_actor * I * td_error * grad
+                self._probabilities[state] = utils.softmax(self._preferences[state])
 
                 I *= self._gamma
+                visited.append(state)
                 state = next_state
 
-            iters += i
+            self._start_sampler.update(visited)
+
+            iters += len(visited)
+            updates += len(visited)
+            self._last_return = episode_return
 
-        return iters
+            yield 1, iters, updates
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns state value estimates."""
-        return self._values
+    def table(self) -> np.ndarray:
+        """Returns [S, A] action preferences."""
+        return self._preferences
 
     @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the greedy policy derived from action preferences."""
-        return utils.calc_best_policy_from_quality(self._preferences)
+    def value_table(self) -> np.ndarray:
+        """Returns [S] state value estimates."""
+        return self._values
 
     @property
     def quality(self) -> dict[State, dict[Action, float]]:
         """Returns action preferences h(s,a) for each state-action pair."""
-        return self._preferences
-
-    def _softmax_policy(self, state: State) -> dict[Action, float]:
-        """Computes π(·|s) via softmax over action preferences h(s, ·)."""
-
-        prefs = self._preferences[state]
-        actions = self._env.actions
-        h = np.array([prefs[a] for a in actions])
-
-        # Numerically stable softmax
-        h = h - np.max(h)
-        exp_h = np.exp(h)
-        probs = exp_h / np.sum(exp_h)
-
-        return {a: float(p) for a, p in zip(actions, probs)}
-
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
+        return utils.quality_to_dict(self._preferences, self._env)
 
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
+    def _calc_action_probabilities(self) -> np.ndarray:
+        """Returns [S, A] softmax policy π(a|s)."""
+        return self._probabilities.copy()
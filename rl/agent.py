@@ -0,0 +1,238 @@
+"""Base class for tabular agents of the GridWorld environment."""
+
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+import numpy as np
+import utils
+from budget import TrainingBudget
+from common import Progress, Snapshot
+from gridworld import Action, GridWorld, State
+from profiling import Profiler, ProfileReport
+from tracing import ConvergenceTrace
+
+if TYPE_CHECKING:
+    from convergence import ConvergenceMonitor
+
+
+class TabularAgent:
+    """Base class of tabular agents.
+
+    Subclasses keep the learned table in an array indexed by flat state index: [S, A] action values (or preferences)
+    or [S] state values. State values, greedy actions and dict based values and policy are derived from it and cached
+    until the table version changes.
+
+    Subclasses implement _train_episodes generator, which yields number of finished episodes (sweeps), total iterations
+    and updates after every episode (batch of episodes, sweep). Training can be run to completion with train or
+    consumed step by step with train_iter, which allows to inspect snapshots or stop at any time.
+    """
+
+    _env: GridWorld
+    _gamma: float
+    _progress = Progress(0, 0)
+    _version = 0  # table version, bumped after every training episode
+    _cache_version = -1
+    _cache: dict[str, Any] = {}
+    _profiler: Profiler | None = None
+    _trace: ConvergenceTrace | None = None
+    _last_return = float("nan")  # sum of undiscounted returns of the episodes of the last training step
+    is_planner = False  # planners (and offline agents) read the environment model or logs, they sample no transitions
+
+    def train(self, monitor: "ConvergenceMonitor | None" = None, *, budget: TrainingBudget | None = None) -> int:
+        """Trains agent, stops early if the monitor reports convergence or budget is exhausted. Returns iterations."""
+        for progress in self.train_iter(monitor=monitor, budget=budget, report_every=0):
+            self._progress = progress
+
+        return self._progress.iterations
+
+    def train_iter(
+        self,
+        monitor: "ConvergenceMonitor | None" = None,
+        *,
+        report_every: int = 1,
+        budget: TrainingBudget | None = None,
+    ) -> Iterator[Progress]:
+        """Trains agent lazily, yields progress every report_every episodes (0 - only at the end) and when finished.
+
+        Training is paused between yields and can be stopped by closing (or just abandoning) the iterator. Monitor and
+        budget are checked after every episode (batch of episodes, sweep), so training always stops at its boundary.
+        """
+        start_time = time.perf_counter()
+        episodes = iterations = updates = 0
+        next_report = report_every
+        reported = -1
+
+        if budget is not None:
+            budget.start()
+
+        episodes_iter = self._train_episodes()
+
+        if self._profiler is not None:
+            episodes_iter = self._profiler.profile_episodes(self, episodes_iter)
+
+        if self._trace is not None:
+            self._trace.start(self)
+
+        for num_episodes, iterations, updates in episodes_iter:
+            episodes += num_episodes
+            self._version += 1
+
+            if self._trace is not None:
+                elapsed = time.perf_counter() - start_time
+                self._trace.record(self, episodes, iterations, updates, elapsed, num_episodes)
+
+            if monitor is not None and monitor.update(self, num_episodes):
+                yield Progress(episodes, iterations, updates, time.perf_counter() - start_time, converged=True)
+                return
+
+            exhausted = budget.exhausted(episodes, iterations, updates) if budget is not None else ""
+
+            if exhausted:
+                yield Progress(episodes, iterations, updates, time.perf_counter() - start_time, exhausted=exhausted)
+                return
+
+            if report_every > 0 and episodes >= next_report:
+                next_report = episodes + report_every
+                reported = episodes
+                yield Progress(episodes, iterations, updates, time.perf_counter() - start_time)
+
+        if reported != episodes:
+            yield Progress(episodes, iterations, updates, time.perf_counter() - start_time)
+
+    @property
+    def env(self) -> GridWorld:
+        """Returns the environment."""
+        return self._env
+
+    @property
+    def gamma(self) -> float:
+        """Returns the discount factor."""
+        return self._gamma
+
+    @property
+    def progress(self) -> Progress:
+        """Returns progress at the end of the last train call."""
+        return self._progress
+
+    def enable_profiling(self, sample_every: int = 16, trace_memory: bool = False) -> None:
+        """Profiles training phases of the following train calls, see profiling.Profiler."""
+        self._profiler = Profiler(sample_every, trace_memory)
+
+    @property
+    def profile(self) -> ProfileReport | None:
+        """Returns profile of training phases since profiling was enabled, None if it is disabled."""
+        return self._profiler.report() if self._profiler is not None else None
+
+    def enable_trace(self, every: int = 1, capacity: int | None = None) -> None:
+        """Records convergence diagnostics of the following train calls every `every` episodes, see ConvergenceTrace.
+
+        By default the trace is preallocated for max_iters episodes (sweeps).
+        """
+        self._trace = ConvergenceTrace(capacity or getattr(self, "_max_iters", 1024) // every + 1, every)
+
+    @property
+    def trace(self) -> ConvergenceTrace | None:
+        """Returns convergence trace, None if tracing is disabled."""
+        return self._trace
+
+    @property
+    def last_return(self) -> float:
+        """Returns sum of undiscounted returns of the episodes finished at the last training step, NaN for planners."""
+        return self._last_return
+
+    def snapshot(self, progress: Progress | None = None) -> Snapshot:
+        """Returns read-only copies of the learned table, state values and greedy actions."""
+        arrays = [self.table.copy(), self.value_table.copy(), self.greedy_actions.copy()]
+
+        for array in arrays:
+            array.flags.writeable = False
+
+        return Snapshot(progress or self._progress, *arrays)
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, total iterations and updates after every episode."""
+        raise NotImplementedError
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns the learned table: [S, A] action values (preferences) or [S] state values."""
+        raise NotImplementedError
+
+    @property
+    def value_table(self) -> np.ndarray:
+        """Returns [S] state values."""
+        table = self.table
+
+        return self._cached("value_table", lambda: np.max(table, axis=1)) if table.ndim == 2 else table
+
+    @property
+    def greedy_actions(self) -> np.ndarray:
+        """Returns [S] greedy action index of each state."""
+        return self._cached("greedy_actions", self._calc_greedy_actions)
+
+    @property
+    def action_probabilities(self) -> np.ndarray:
+        """Returns [S, A] action probabilities of the learned policy: one-hot greedy actions by default."""
+        return self._cached("action_probabilities", self._calc_action_probabilities)
+
+    @property
+    def values(self) -> dict[State, float]:
+        """Returns state values."""
+        return dict(self._cached("values", lambda: utils.values_to_dict(self.value_table, self._env)))
+
+    @property
+    def policy(self) -> dict[State, Action]:
+        """Returns the best action for each state."""
+        return dict(self._cached("policy", lambda: utils.actions_to_policy(self.greedy_actions, self._env)))
+
+    def best_actions(self, state_indices: np.ndarray) -> np.ndarray:
+        """Returns greedy action indices of the given flat state indices."""
+        return self.greedy_actions[state_indices]
+
+    def state_values(self, state_indices: np.ndarray) -> np.ndarray:
+        """Returns values of the given flat state indices."""
+        return self.value_table[state_indices]
+
+    def invalidate(self) -> None:
+        """Bumps the table version, cached derived outputs are recomputed on the next access.
+
+        Training bumps the version after every episode (batch of episodes, sweep), call it after modifying the table
+        outside of training.
+        """
+        self._version += 1
+
+    def _calc_greedy_actions(self) -> np.ndarray:
+        """Computes [S] greedy action index of each state."""
+        table = self.table
+
+        if table.ndim == 2:
+            return np.argmax(table, axis=1)
+
+        # If model is available, we can derive the policy from the state values by one-step lookahead.
+        return utils.calc_greedy_actions_from_values(self._env, table, self._gamma)
+
+    def _calc_action_probabilities(self) -> np.ndarray:
+        """Computes [S, A] action probabilities of the learned policy."""
+        probabilities = np.zeros((self._env.num_states, len(self._env.actions)))
+        probabilities[np.arange(self._env.num_states), self.greedy_actions] = 1.0
+
+        return probabilities
+
+    def _cached(self, name: str, calc: Callable[[], Any]) -> Any:
+        """Returns output cached for the current table version, calculates it on miss.
+
+        Cached arrays are read-only, as they are shared between callers.
+        """
+        if self._cache_version != self._version:
+            self._cache = {}
+            self._cache_version = self._version
+
+        if name not in self._cache:
+            value = calc()
+
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+            self._cache[name] = value
+
+        return self._cache[name]
@@ -0,0 +1,272 @@
+"""Benchmark suite of GridWorld planners and learners across grid sizes with baselines and regression report."""
+
+import argparse
+import json
+import platform
+import random
+import resource
+import time
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from typing import Any, Sequence
+
+import maps
+import numpy as np
+from agent import TabularAgent
+from budget import TrainingBudget
+from convergence import PolicyStabilityMonitor
+from gridworld import GridWorld
+from mcqagent import MonteCarloQAgent
+from piagent import PolicyIterationAgent
+from qagent import QLearningAgent
+from sarsaagent import SARSAAgent
+from tdlagent import TemporalDifferenceLambdaAgent
+from viagent import ValueIterationAgent
+
+SIZES = (4, 16, 64, 256, 1000)
+VARIANTS = ("open", "multi_terminal", "maze", "rooms")
+
+# Agents with the largest grid side they are benchmarked on: Python planners sweep all states on every iteration.
+AGENTS: tuple[tuple[type[TabularAgent], int], ...] = (
+    (ValueIterationAgent, 256),
+    (PolicyIterationAgent, 64),
+    (MonteCarloQAgent, 1000),
+    (QLearningAgent, 1000),
+    (SARSAAgent, 1000),
+    (TemporalDifferenceLambdaAgent, 1000),
+)
+
+# Relative change of a metric treated as regression, throughput is noisy on shared machines.
+TOLERANCE = 0.2
+
+
+def make_env(variant: str, size: int) -> GridWorld:
+    """Returns GridWorld of the variant: "open" (single terminal in the corner), "multi_terminal", "maze" or "rooms"."""
+    if variant == "open":
+        return GridWorld((size, size), ((size - 1, size - 1),))
+
+    if variant == "multi_terminal":
+        middle = size // 2
+        return GridWorld((size, size), ((size - 1, size - 1), (0, size - 1), (size - 1, 0), (middle, middle)))
+
+    # Procedural maps are seeded, so every run benchmarks the same layout.
+    if variant == "maze":
+        return maps.make_world(maps.recursive_maze((size, size), np.random.default_rng(size)))
+
+    if variant == "rooms":
+        return maps.make_world(maps.rooms((size, size), max(size // 8, 2), rng=np.random.default_rng(size)))
+
+    raise ValueError(f"unknown GridWorld variant: {variant}")
+
+
+@dataclass(frozen=True)
+class Case:
+    """Benchmark case: agent class trained on a GridWorld variant of the given size."""
+
+    agent_class: type[TabularAgent]
+    variant: str
+    size: int
+    params: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Returns key identifying the case in baselines."""
+        return f"{self.agent_class.__name__}/{self.variant}/{self.size}x{self.size}"
+
+
+@dataclass(frozen=True)
+class Measurement:
+    """Benchmark case measurement."""
+
+    key: str
+    wall_time: float
+    episodes: int  # episodes, sweeps for planners
+    iterations: int
+    updates: int
+    sweeps_per_sec: float  # episodes (sweeps for planners) per second
+    transitions_per_sec: float  # environment transitions (looked up transitions for planners) per second
+    peak_memory: int  # peak resident memory growth, bytes
+    converged_iterations: int | None  # iterations to convergence, None if not converged within budget and max_iters
+
+
+def make_cases(
+    sizes: Sequence[int] = SIZES, variants: Sequence[str] = VARIANTS, agents: Sequence[tuple[type, int]] = AGENTS
+) -> list[Case]:
+    """Returns cases of every agent, variant and size up to the agent max size."""
+    return [
+        Case(agent_class, variant, size)
+        for agent_class, max_size in agents
+        for variant in variants
+        for size in sizes
+        if size <= max_size
+    ]
+
+
+def run_case(case: Case, seconds: float = 5.0, seed: int = 0) -> Measurement:
+    """Trains agent of the case within the time budget and measures it, expected to run in a fresh process."""
+    random.seed(seed)
+    np.random.seed(seed)
+
+    start_memory = _get_max_rss()
+    env = make_env(case.variant, case.size)
+    env.next_state_table  # pylint: disable=pointless-statement  # build tables outside of the measured time
+    agent = case.agent_class(env, **case.params)
+
+    # Planners stop on their own convergence criterion, learners when the greedy policy is stable.
+    planner = agent.is_planner
+    monitor = None if planner else PolicyStabilityMonitor(check_every=10, patience=5)
+
+    start_time = time.perf_counter()
+    agent.train(monitor=monitor, budget=TrainingBudget(seconds=seconds))
+    wall_time = time.perf_counter() - start_time
+
+    progress = agent.progress
+    converged = progress.converged or (planner and not progress.exhausted)
+    transitions = progress.updates * len(env.actions) if planner else progress.iterations
+
+    return Measurement(
+        case.key,
+        wall_time,
+        progress.episodes,
+        progress.iterations,
+        progress.updates,
+        progress.episodes / wall_time,
+        transitions / wall_time,
+        _get_max_rss() - start_memory,
+        progress.iterations if converged else None,
+    )
+
+
+def run_cases(cases: Sequence[Case], seconds: float = 5.0, seed: int = 0) -> list[Measurement]:
+    """Runs every case in its own process, so peak memory and caches are not shared between cases."""
+    measurements = []
+
+    with get_context("spawn").Pool(processes=1, maxtasksperchild=1) as pool:
+        for case in cases:
+            measurement = pool.apply(run_case, (case, seconds, seed))
+            measurements.append(measurement)
+            print(_format_measurement(measurement), flush=True)
+
+    return measurements
+
+
+def save_baseline(measurements: Sequence[Measurement], path: str) -> None:
+    """Saves measurements as a JSON baseline together with the machine description."""
+    baseline = {
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "numpy": np.__version__},
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "measurements": {measurement.key: asdict(measurement) for measurement in measurements},
+    }
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(baseline, file, indent=2)
+
+
+def load_baseline(path: str) -> dict[str, Measurement]:
+    """Returns baseline measurements by case key."""
+    with open(path, encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    return {key: Measurement(**measurement) for key, measurement in baseline["measurements"].items()}
+
+
+def compare(
+    measurements: Sequence[Measurement], baseline: dict[str, Measurement], tolerance: float = TOLERANCE
+) -> list[tuple[str, str, float, float]]:
+    """Returns regressions (case key, metric, baseline value, current value) beyond tolerance."""
+    regressions = []
+
+    for measurement in measurements:
+        reference = baseline.get(measurement.key)
+
+        if reference is None:
+            continue
+
+        for metric in ("sweeps_per_sec", "transitions_per_sec"):
+            old, new = getattr(reference, metric), getattr(measurement, metric)
+
+            if new < old * (1.0 - tolerance):
+                regressions.append((measurement.key, metric, old, new))
+
+        # Memory is measured in pages of resident set, small grids are below its resolution
+        max_memory = max(reference.peak_memory * (1.0 + tolerance), reference.peak_memory + (1 << 20))
+
+        if measurement.peak_memory > max_memory:
+            regressions.append((measurement.key, "peak_memory", reference.peak_memory, measurement.peak_memory))
+
+        old_iterations, new_iterations = reference.converged_iterations, measurement.converged_iterations
+
+        if old_iterations is not None and (new_iterations is None or new_iterations > old_iterations * (1 + tolerance)):
+            regressions.append((measurement.key, "converged_iterations", old_iterations, new_iterations or -1))
+
+    return regressions
+
+
+def format_report(
+    measurements: Sequence[Measurement], baseline: dict[str, Measurement], tolerance: float = TOLERANCE
+) -> str:
+    """Returns comparison report: relative change of throughput for every case and the list of regressions."""
+    lines = [f"{'case':50} {'sweeps/s':>12} {'transitions/s':>14} {'Δ transitions/s':>16}"]
+
+    for measurement in measurements:
+        reference = baseline.get(measurement.key)
+        change = (
+            f"{measurement.transitions_per_sec / reference.transitions_per_sec - 1.0:+.1%}"
+            if reference is not None and reference.transitions_per_sec > 0.0
+            else "new"
+        )
+        lines.append(
+            f"{measurement.key:50} {measurement.sweeps_per_sec:12.1f} {measurement.transitions_per_sec:14.0f} "
+            f"{change:>16}"
+        )
+
+    regressions = compare(measurements, baseline, tolerance)
+    lines.append("")
+    lines.append(f"{len(regressions)} regression(s) beyond {tolerance:.0%}:" if regressions else "No regressions.")
+
+    for key, metric, old, new in regressions:
+        lines.append(f"  {key}: {metric} {old:.4g} -> {new:.4g}")
+
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="grid sides")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), help="GridWorld variants")
+    parser.add_argument("--seconds", type=float, default=5.0, help="training time budget of a case")
+    parser.add_argument("--save", help="save measurements as baseline")
+    parser.add_argument("--baseline", help="compare measurements with baseline")
+    args = parser.parse_args()
+
+    measurements = run_cases(make_cases(args.sizes, args.variants), args.seconds)
+
+    if args.save:
+        save_baseline(measurements, args.save)
+
+    if args.baseline:
+        print()
+        print(format_report(measurements, load_baseline(args.baseline)))
+
+
+def _get_max_rss() -> int:
+    """Returns peak resident set size of the process in bytes."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if platform.system() == "Darwin" else max_rss * 1024
+
+
+def _format_measurement(measurement: Measurement) -> str:
+    """Returns one line summary of the measurement."""
+    converged = measurement.converged_iterations if measurement.converged_iterations is not None else "-"
+
+    return (
+        f"{measurement.key:50} {measurement.wall_time:7.2f} s {measurement.episodes:8d} episodes "
+        f"{measurement.transitions_per_sec:12.0f} transitions/s {measurement.peak_memory / 2**20:8.1f} MiB "
+        f"converged: {converged}"
+    )
+
+
+if __name__ == "__main__":
+    main()
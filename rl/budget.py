@@ -0,0 +1,59 @@
+"""Training budgets: wall-clock time, environment steps and table updates."""
+
+import time
+
+
+class TrainingBudget:
+    """Limits agent training by wall-clock seconds, environment steps (iterations) and table updates.
+
+    Agent checks the budget at episode boundaries (after a batch of episodes or a sweep), so training stops cleanly with
+    consistent tables and can overshoot by at most one episode. Step and update limits are plain integer comparisons.
+    The clock is read only every few episodes: the number of episodes between reads is estimated from the measured
+    episode rate, so that about check_interval seconds pass between reads.
+    """
+
+    def __init__(
+        self,
+        seconds: float | None = None,
+        steps: int | None = None,
+        updates: int | None = None,
+        check_interval: float = 0.01,
+    ) -> None:
+        self._seconds = seconds
+        self._steps = steps
+        self._updates = updates
+        self._check_interval = check_interval
+        self._start_time = 0.0
+        self._next_check = 0
+
+    @property
+    def elapsed(self) -> float:
+        """Returns seconds since the budget was started."""
+        return time.perf_counter() - self._start_time
+
+    def start(self) -> None:
+        """Starts the clock, called by the agent when training begins."""
+        self._start_time = time.perf_counter()
+        self._next_check = 0
+
+    def exhausted(self, episodes: int, iterations: int, updates: int) -> str:
+        """Returns name of the exhausted budget ("seconds", "steps" or "updates"), empty string if none."""
+        if self._steps is not None and iterations >= self._steps:
+            return "steps"
+
+        if self._updates is not None and updates >= self._updates:
+            return "updates"
+
+        if self._seconds is None or episodes < self._next_check:
+            return ""
+
+        elapsed = self.elapsed
+
+        if elapsed >= self._seconds:
+            return "seconds"
+
+        # Schedule the next clock read: episodes expected in check_interval, but not later than the remaining time.
+        rate = episodes / max(elapsed, 1e-9)
+        self._next_check = episodes + max(1, int(rate * min(self._check_interval, self._seconds - elapsed)))
+
+        return ""
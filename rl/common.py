@@ -1,8 +1,19 @@
 """ "Common utilities and classes for reinforcement learning agents."""
 
 from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator, overload
 
-from gridworld import Action, State
+import numpy as np
+from gridworld import Action, GridWorld, State
+
+# Packed layout of a single episode step: state index, action and reward.
+EPISODE_DTYPE = np.dtype([("state", np.int32), ("action", np.int8), ("reward", np.float64)])
+
+# Packed layout of a single transition stored for replay.
+TRANSITION_DTYPE = np.dtype(
+    [("state", np.int32), ("action", np.int8), ("reward", np.float64), ("next_state", np.int32), ("done", np.bool_)]
+)
 
 
 @dataclass(frozen=True)
@@ -12,3 +23,245 @@ class EpisodeItem:
     state: State
     action: Action
     reward: float
+
+
+class Episode:
+    """Represents an episode stored as a growable array of EPISODE_DTYPE items.
+
+    Steps are packed into a single preallocated array which doubles its capacity when full, so appending a step does
+    not allocate Python objects. Items are accessible as EpisodeItem for compatibility, columns as zero-copy views.
+    """
+
+    def __init__(self, env: GridWorld, capacity: int = 16) -> None:
+        self._env = env
+        self._steps = np.zeros(capacity, dtype=EPISODE_DTYPE)
+        self._length = 0
+
+    def append(self, state: State, action: Action, reward: float) -> None:
+        """Appends a step to the episode."""
+        if self._length == len(self._steps):
+            steps = np.zeros(max(2 * len(self._steps), 1), dtype=EPISODE_DTYPE)
+            steps[: self._length] = self._steps
+            self._steps = steps
+
+        self._steps[self._length] = (self._env.state_index(state), action, reward)
+        self._length += 1
+
+    @property
+    def steps(self) -> np.ndarray:
+        """Returns structured array view of the episode steps."""
+        return self._steps[: self._length]
+
+    @property
+    def states(self) -> np.ndarray:
+        """Returns array view of state indices."""
+        return self.steps["state"]
+
+    @property
+    def actions(self) -> np.ndarray:
+        """Returns array view of actions."""
+        return self.steps["action"]
+
+    @property
+    def rewards(self) -> np.ndarray:
+        """Returns array view of rewards."""
+        return self.steps["reward"]
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> EpisodeItem: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[EpisodeItem]: ...
+
+    def __getitem__(self, index: int | slice) -> EpisodeItem | list[EpisodeItem]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+
+        if index < 0:
+            index += self._length
+
+        if not 0 <= index < self._length:
+            raise IndexError("episode index out of range")
+
+        state, action, reward = self._steps[index].item()
+
+        return EpisodeItem(self._env.index_state(state), Action(action), reward)
+
+    def __iter__(self) -> Iterator[EpisodeItem]:
+        for i in range(self._length):
+            yield self[i]
+
+
+@dataclass(frozen=True)
+class EpisodeBatch:
+    """Represents a batch of episodes stored as padded [B, T] structured array of EPISODE_DTYPE items."""
+
+    steps: np.ndarray
+    lengths: np.ndarray
+
+    @property
+    def states(self) -> np.ndarray:
+        """Returns [B, T] array of state indices."""
+        return self.steps["state"]
+
+    @property
+    def actions(self) -> np.ndarray:
+        """Returns [B, T] array of actions."""
+        return self.steps["action"]
+
+    @property
+    def rewards(self) -> np.ndarray:
+        """Returns [B, T] array of rewards, padded with zeros."""
+        return self.steps["reward"]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Returns [B, T] boolean array marking valid (non-padded) steps."""
+        return np.arange(self.steps.shape[1]) < self.lengths[:, None]
+
+
+@dataclass(frozen=True)
+class Progress:
+    """Training progress reported by TabularAgent.train_iter."""
+
+    episodes: int  # finished episodes, sweeps for planning agents
+    iterations: int  # environment steps, evaluation sweeps for planning agents
+    updates: int = 0  # applied table updates including replayed and planned ones, state backups for planning agents
+    elapsed: float = 0.0  # seconds since training started
+    converged: bool = False
+    exhausted: str = ""  # name of the exhausted budget: "seconds", "steps" or "updates"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Read-only copy of agent tables taken during training."""
+
+    progress: Progress
+    table: np.ndarray
+    values: np.ndarray
+    actions: np.ndarray
+
+
+class TraceType(Enum):
+    """Eligibility trace update rules on visit of a state (state-action pair)."""
+
+    ACCUMULATING = "accumulating"  # e ← e + 1
+    REPLACING = "replacing"  # e ← 1
+    DUTCH = "dutch"  # e ← (1 - α) · e + 1
+
+
+class LinearMethod(Enum):
+    """Semi-gradient update rules of linear agents."""
+
+    TD = "td"  # V(s) ← V(s) + α · (r + γ · V(s') - V(s))
+    SARSA = "sarsa"  # Q(s, a) ← Q(s, a) + α · (r + γ · Q(s', a') - Q(s, a))
+    Q_LEARNING = "q_learning"  # Q(s, a) ← Q(s, a) + α · (r + γ · max Q(s', ·) - Q(s, a))
+
+
+class EligibilityTraces:
+    """Sparse eligibility traces over flat table indices.
+
+    Only active (recently visited) indices are stored together with their trace values, so update and decay cost is
+    proportional to the number of active traces, not to the table size. Traces decayed below min_trace are dropped.
+    """
+
+    def __init__(self, size: int, trace_type: TraceType = TraceType.ACCUMULATING, min_trace: float = 1e-4) -> None:
+        self._trace_type = trace_type
+        self._min_trace = min_trace
+        self._slots = np.full(size, -1, dtype=np.int64)  # table index -> position in active arrays
+        self._indices = np.zeros(16, dtype=np.int64)
+        self._values = np.zeros(16)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Returns array view of active table indices."""
+        return self._indices[: self._length]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Returns array view of active trace values."""
+        return self._values[: self._length]
+
+    def visit(self, index: int, alpha: float) -> None:
+        """Updates trace of the visited table index."""
+        slot = self._slots[index]
+
+        if slot < 0:
+            if self._length == len(self._indices):
+                self._indices = np.resize(self._indices, 2 * self._length)
+                self._values = np.resize(self._values, 2 * self._length)
+
+            slot = self._length
+            self._slots[index] = slot
+            self._indices[slot] = index
+            self._values[slot] = 0.0
+            self._length += 1
+
+        if self._trace_type == TraceType.ACCUMULATING:
+            self._values[slot] += 1.0
+        elif self._trace_type == TraceType.REPLACING:
+            self._values[slot] = 1.0
+        else:
+            self._values[slot] = (1.0 - alpha) * self._values[slot] + 1.0
+
+    def update(self, table: np.ndarray, step: float) -> None:
+        """Applies table[i] += step · e(i) for all active indices of the flat table."""
+        table[self.indices] += step * self.values
+
+    def decay(self, factor: float) -> None:
+        """Decays all traces by factor (γλ) and drops negligible ones."""
+        values = self.values
+        values *= factor
+
+        if self._length and values.min() < self._min_trace:
+            keep = values >= self._min_trace
+            self._slots[self.indices[~keep]] = -1
+
+            length = int(keep.sum())
+            self._indices[:length] = self.indices[keep]
+            self._values[:length] = values[keep]
+            self._length = length
+            self._slots[self.indices] = np.arange(length)
+
+    def clear(self) -> None:
+        """Resets all traces to zero."""
+        self._slots[self.indices] = -1
+        self._length = 0
+
+
+@dataclass(frozen=True)
+class ReplayConfig:
+    """Experience replay settings: ratio replayed transitions per environment step, applied in minibatches."""
+
+    ratio: float = 1.0
+    capacity: int = 10000
+    batch_size: int = 32
+
+
+class ReplayBuffer:
+    """Fixed capacity ring buffer of TRANSITION_DTYPE transitions, the oldest transitions are overwritten."""
+
+    def __init__(self, capacity: int) -> None:
+        self._transitions = np.zeros(capacity, dtype=TRANSITION_DTYPE)
+        self._position = 0
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add(self, state: int, action: int, reward: float, next_state: int, done: bool) -> None:
+        """Stores a transition."""
+        self._transitions[self._position] = (state, action, reward, next_state, done)
+        self._position = (self._position + 1) % len(self._transitions)
+        self._length = min(self._length + 1, len(self._transitions))
+
+    def sample(self, batch_size: int) -> np.ndarray:
+        """Returns uniformly sampled (with replacement) structured array of transitions."""
+        return self._transitions[np.random.randint(0, self._length, size=batch_size)]
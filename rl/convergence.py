@@ -0,0 +1,143 @@
+"""Convergence monitors for early stopping of agents training."""
+
+import numpy as np
+from agent import TabularAgent
+
+
+class ConvergenceMonitor:
+    """Base class of convergence monitors.
+
+    Agent calls update after every episode (batch of episodes). The criterion is checked every check_every episodes and
+    training is considered converged when it holds for patience consecutive checks.
+    """
+
+    def __init__(self, check_every: int = 10, patience: int = 1) -> None:
+        self._check_every = check_every
+        self._patience = patience
+        self._episodes = 0
+        self._next_check = check_every
+        self._hits = 0
+        self._converged = False
+
+    @property
+    def converged(self) -> bool:
+        """Returns True if the criterion is met."""
+        return self._converged
+
+    @property
+    def episodes(self) -> int:
+        """Returns number of episodes seen by the monitor."""
+        return self._episodes
+
+    def reset(self) -> None:
+        """Resets monitor state."""
+        self._episodes = 0
+        self._next_check = self._check_every
+        self._hits = 0
+        self._converged = False
+
+    def update(self, agent: TabularAgent, episodes: int = 1) -> bool:
+        """Records finished episodes and returns True if training should stop."""
+        self._episodes += episodes
+
+        if self._episodes < self._next_check:
+            return False
+
+        self._next_check = self._episodes + self._check_every
+        self._hits = self._hits + 1 if self._check(agent) else 0
+        self._converged = self._hits >= self._patience
+
+        return self._converged
+
+    def _check(self, agent: TabularAgent) -> bool:
+        """Returns True if the criterion holds for the current agent tables."""
+        raise NotImplementedError
+
+
+class DeltaMonitor(ConvergenceMonitor):
+    """Converged when max |Δ| of the learned table over the last check_every episodes is below tolerance."""
+
+    def __init__(self, tolerance: float = 1e-3, check_every: int = 10, patience: int = 1) -> None:
+        super().__init__(check_every, patience)
+        self._tolerance = tolerance
+        self._previous: np.ndarray | None = None
+        self._delta = float("inf")
+
+    @property
+    def delta(self) -> float:
+        """Returns max |Δ| measured at the last check."""
+        return self._delta
+
+    def reset(self) -> None:
+        super().reset()
+        self._previous = None
+        self._delta = float("inf")
+
+    def _check(self, agent: TabularAgent) -> bool:
+        table = agent.table
+
+        if self._previous is None:
+            self._previous = table.copy()
+            return False
+
+        self._delta = float(np.max(np.abs(table - self._previous), initial=0.0))
+        self._previous[...] = table
+
+        return self._delta < self._tolerance
+
+
+class PolicyStabilityMonitor(ConvergenceMonitor):
+    """Converged when the greedy policy has not changed for patience consecutive checks."""
+
+    def __init__(self, check_every: int = 10, patience: int = 5) -> None:
+        super().__init__(check_every, patience)
+        self._previous: np.ndarray | None = None
+        self._changes = -1
+
+    @property
+    def changes(self) -> int:
+        """Returns number of states whose greedy action changed at the last check, -1 before the first comparison."""
+        return self._changes
+
+    def reset(self) -> None:
+        super().reset()
+        self._previous = None
+        self._changes = -1
+
+    def _check(self, agent: TabularAgent) -> bool:
+        actions = agent.greedy_actions
+
+        if self._previous is None:
+            self._previous = actions.copy()
+            return False
+
+        self._changes = int(np.count_nonzero(actions != self._previous))
+        self._previous[...] = actions
+
+        return self._changes == 0
+
+
+class ReferenceValuesMonitor(ConvergenceMonitor):
+    """Converged when max |V - V*| to the reference state values (e.g. from a planner) is below tolerance."""
+
+    def __init__(
+        self, reference: np.ndarray, tolerance: float = 1e-2, check_every: int = 10, patience: int = 1
+    ) -> None:
+        super().__init__(check_every, patience)
+        self._reference = np.asarray(reference, dtype=float)
+        self._tolerance = tolerance
+        self._distance = float("inf")
+
+    @property
+    def distance(self) -> float:
+        """Returns max |V - V*| measured at the last check."""
+        return self._distance
+
+    def reset(self) -> None:
+        super().reset()
+        self._distance = float("inf")
+
+    def _check(self, agent: TabularAgent) -> bool:
+        self._distance = float(np.max(np.abs(agent.value_table - self._reference), initial=0.0))
+
+        return self._distance < self._tolerance
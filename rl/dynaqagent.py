@@ -0,0 +1,137 @@
+"""Dyna-Q Agent"""
+
+from typing import Iterator
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
+
+
+class DynaQAgent(TabularAgent):
+    """Dyna-Q (Dyna-Q+) agent to find the optimal policy for a given GridWorld environment.
+
+    Every real transition is recorded in a learned model and followed by planning_steps simulated Q-learning updates
+    on transitions sampled from the model.
+    """
+
+    def __init__(
+        self,
+        env: GridWorld,
+        alpha: float = 0.1,
+        gamma: float = 0.99,
+        epsilon: float = 0.25,
+        planning_steps: int = 10,
+        kappa: float = 0.0,
+        max_steps: int = 100,
+        max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
+    ) -> None:
+        self._env = env
+        self._alpha = alpha
+        self._gamma = gamma
+        self._epsilon = epsilon
+        self._planning_steps = planning_steps
+        self._kappa = kappa
+        self._max_steps = max_steps
+        self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._q = np.zeros((env.num_states, len(env.actions)))
+
+        # Learned deterministic model: last observed next state and reward for each state-action pair
+        self._model_next_states = np.full(self._q.size, -1, dtype=np.int64)
+        self._model_rewards = np.zeros(self._q.size)
+        # Time step of the last real visit, used by Dyna-Q+ exploration bonus κ·√τ
+        self._last_visits = np.zeros(self._q.size, dtype=np.int64)
+        # Flat indices of observed state-action pairs to sample planning updates from
+        self._observed = np.zeros(16, dtype=np.int64)
+        self._num_observed = 0
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        num_actions = len(self._env.actions)
+        env_step, terminals = self._env.step, self._env.terminal_mask
+
+        for _ in range(self._max_iters):
+            state, action = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
+
+            for _ in range(self._max_steps):
+                if terminals[state]:
+                    break
+
+                if action < 0:
+                    action = utils.sample_epsilon_greedy_action(self._q[state], self._epsilon)
+
+                next_state, reward = env_step(state, action)
+                episode_return += reward
+
+                self._q[state, action] += self._alpha * (
+                    reward + self._gamma * np.max(self._q[next_state]) - self._q[state, action]
+                )
+
+                iters += 1  # iterations are environment steps, the running count is also the Dyna-Q+ time step
+                self._update_model(state * num_actions + action, next_state, reward, iters)
+                updates += self._plan(iters)
+
+                visited.append(state)
+                state = next_state
+                action = -1
+
+            self._start_sampler.update(visited)
+
+            updates += len(visited)
+            self._last_return = episode_return
+
+            yield 1, iters, updates
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns [S, A] quality of state-action pairs."""
+
+        return self._q
+
+    @property
+    def quality(self) -> dict[State, dict[Action, float]]:
+        """Returns the quality of state-action pairs."""
+
+        return utils.quality_to_dict(self._q, self._env)
+
+    def _update_model(self, index: int, next_state: int, reward: float, step: int) -> None:
+        """Records observed transition of the state-action pair in the model."""
+
+        if self._model_next_states[index] < 0:
+            if self._num_observed == len(self._observed):
+                self._observed = np.resize(self._observed, 2 * self._num_observed)
+
+            self._observed[self._num_observed] = index
+            self._num_observed += 1
+
+        self._model_next_states[index] = next_state
+        self._model_rewards[index] = reward
+        self._last_visits[index] = step
+
+    def _plan(self, step: int) -> int:
+        """Applies a batch of simulated Q-learning updates on transitions sampled from the model, returns its size."""
+
+        if self._planning_steps <= 0:
+            return 0
+
+        indices = self._observed[np.random.randint(0, self._num_observed, size=self._planning_steps)]
+        rewards = self._model_rewards[indices]
+
+        if self._kappa > 0.0:
+            # Dyna-Q+: bonus for pairs not tried for a long time encourages to re-explore changed environment
+            rewards = rewards + self._kappa * np.sqrt(step - self._last_visits[indices])
+
+        q = self._q.reshape(-1)
+        targets = rewards + self._gamma * np.max(self._q[self._model_next_states[indices]], axis=1)
+
+        # All updates of the batch are computed from the same Q values, a duplicated pair is updated once.
+        q[indices] += self._alpha * (targets - q[indices])
+
+        return self._planning_steps
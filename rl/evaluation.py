@@ -0,0 +1,123 @@
+"""Exact policy evaluation and regret against the optimal values."""
+
+from dataclasses import dataclass
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from gridworld import GridWorld
+
+
+@dataclass(frozen=True)
+class Evaluation:
+    """Exact values of an evaluated policy and its regret against the optimal values."""
+
+    values: np.ndarray  # [S] V^π
+    regret: np.ndarray  # [S] V* - V^π
+    mean_regret: float  # regret averaged over the start distribution
+    max_regret: float
+
+
+class PolicyEvaluator:
+    """Computes exact value function of a policy through the GridWorld model.
+
+    V^π = r_π + γ P_π V^π, with P_π and r_π expected over stochastic transition outcomes, is solved directly (dense
+    linear solve) for small grids, and by vectorized iterative evaluation warm started from the previous result
+    otherwise, so repeated calls during training are cheap. Optimal values are computed once by vectorized value
+    iteration unless provided (e.g. from a planner agent).
+    """
+
+    def __init__(
+        self,
+        env: GridWorld,
+        gamma: float = 0.99,
+        optimal_values: np.ndarray | None = None,
+        start_weights: np.ndarray | None = None,
+        theta: float = 1e-8,
+        max_iters: int = 10000,
+        max_solve_states: int = 1024,
+    ) -> None:
+        self._env = env
+        self._gamma = gamma
+        self._theta = theta
+        self._max_iters = max_iters
+        self._solve = gamma < 1.0 and env.num_states <= max_solve_states
+        self._values = np.zeros(env.num_states)
+
+        # Start distribution: uniform over non-terminal states as in StartStateSampler by default
+        weights = (~env.terminal_mask).astype(float) if start_weights is None else np.asarray(start_weights, float)
+        self._start_weights = weights / weights.sum()
+
+        self._optimal_values = (
+            np.asarray(optimal_values, dtype=float) if optimal_values is not None else self._calc_optimal_values()
+        )
+
+    @property
+    def optimal_values(self) -> np.ndarray:
+        """Returns [S] optimal state values."""
+        return self._optimal_values
+
+    def evaluate(self, agent: TabularAgent, epsilon: float | None = 0.0) -> Evaluation:
+        """Evaluates ε-greedy policy over agent greedy actions, or agent action probabilities if epsilon is None."""
+        if epsilon is None:
+            return self.evaluate_probabilities(agent.action_probabilities)
+
+        return self.evaluate_probabilities(
+            utils.calc_epsilon_greedy_probabilities(agent.greedy_actions, len(self._env.actions), epsilon)
+        )
+
+    def evaluate_probabilities(self, probabilities: np.ndarray) -> Evaluation:
+        """Evaluates policy given by [S, A] action probabilities."""
+        values = self.calc_values(probabilities)
+        regret = self._optimal_values - values
+
+        return Evaluation(values, regret, float(self._start_weights @ regret), float(np.max(regret)))
+
+    def calc_values(self, probabilities: np.ndarray) -> np.ndarray:
+        """Returns [S] exact values of the policy given by [S, A] action probabilities."""
+        terminals = self._env.terminal_mask
+
+        # Terminal states are absorbing with zero reward, so their rows are zeroed and V(terminal) = 0
+        probabilities = probabilities * ~terminals[:, None]
+
+        if self._solve:
+            # P_π[s, s'] = Σₐ π(a|s) · Σₖ p(k|s, a) · 1{next(s, a, k) = s'}, r_π[s] = Σₐ π(a|s) · E[r|s, a]
+            rewards = np.sum(probabilities * self._env.reward_table, axis=1)
+            transitions = np.zeros((self._env.num_states, self._env.num_states))
+            np.add.at(
+                transitions,
+                (np.arange(self._env.num_states)[:, None, None], self._env.outcome_states),
+                probabilities[:, :, None] * self._env.outcome_probabilities,
+            )
+            self._values = np.linalg.solve(np.eye(self._env.num_states) - self._gamma * transitions, rewards)
+
+            return self._values.copy()
+
+        values = self._values
+
+        for _ in range(self._max_iters):
+            new_values = np.sum(probabilities * self._env.calc_action_values(values, self._gamma), axis=1)
+            delta = np.max(np.abs(new_values - values), initial=0.0)
+            values = new_values
+
+            if delta < self._theta:
+                break
+
+        self._values = values
+
+        return values.copy()
+
+    def _calc_optimal_values(self) -> np.ndarray:
+        """Returns [S] optimal values by vectorized value iteration."""
+        terminals = self._env.terminal_mask
+        values = np.zeros(self._env.num_states)
+
+        for _ in range(self._max_iters):
+            new_values = np.where(terminals, 0.0, np.max(self._env.calc_action_values(values, self._gamma), axis=1))
+            delta = np.max(np.abs(new_values - values), initial=0.0)
+            values = new_values
+
+            if delta < self._theta:
+                break
+
+        return values
@@ -0,0 +1,153 @@
+"""Parallel multi-agent, multi-seed experiment runner for GridWorld agents."""
+
+import csv
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Sequence
+
+import numpy as np
+from agent import TabularAgent
+from evaluation import PolicyEvaluator
+from gridworld import GridWorld
+
+
+@dataclass(frozen=True)
+class Job:
+    """Single training run: agent class with hyperparameters, environment parameters and seed."""
+
+    agent_class: type[TabularAgent]
+    params: dict[str, Any] = field(default_factory=dict)
+    env_params: dict[str, Any] = field(default_factory=dict)
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class Result:
+    """Result of a training run."""
+
+    agent: str
+    params: str
+    seed: int
+    episodes: int
+    iterations: int
+    wall_time: float
+    env_steps: int  # sampled environment transitions, 0 for planners
+    steps_per_sec: float  # environment transitions per second, NaN for planners
+    mean_regret: float
+    max_regret: float
+
+
+def make_jobs(
+    agents: Sequence[tuple[type[TabularAgent], dict[str, Any]]],
+    num_seeds: int,
+    base_seed: int = 0,
+    env_params: dict[str, Any] | None = None,
+) -> list[Job]:
+    """Returns jobs for every (agent class, hyperparameters) pair and seed.
+
+    Seeds are spawned from base_seed, so results do not depend on the number of processes or job completion order.
+    """
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(base_seed).spawn(num_seeds)]
+
+    return [Job(agent_class, params, env_params or {}, seed) for agent_class, params in agents for seed in seeds]
+
+
+def run_job(job: Job) -> Result:
+    """Seeds global random generators, trains the agent and evaluates its greedy policy regret."""
+    random.seed(job.seed)
+    np.random.seed(job.seed)
+
+    env = GridWorld(**job.env_params)
+    agent = job.agent_class(env, **job.params)
+
+    start_time = time.perf_counter()
+    iterations = agent.train()
+    wall_time = time.perf_counter() - start_time
+
+    # Iterations of learners are environment steps, planners only read the model and sample none
+    steps = 0 if agent.is_planner else iterations
+    evaluation = PolicyEvaluator(env, agent.gamma).evaluate(agent)
+
+    return Result(
+        job.agent_class.__name__,
+        format_params(job.params),
+        job.seed,
+        agent.progress.episodes,
+        iterations,
+        wall_time,
+        steps,
+        steps / wall_time if steps > 0 and wall_time > 0.0 else float("nan"),
+        evaluation.mean_regret,
+        evaluation.max_regret,
+    )
+
+
+def run_jobs(jobs: Sequence[Job], processes: int | None = None) -> list[Result]:
+    """Runs jobs over a process pool (all cores by default, 1 - in this process), results keep the jobs order."""
+    if processes == 1:
+        return [run_job(job) for job in jobs]
+
+    processes = processes or os.cpu_count() or 1
+
+    # A few chunks per process balance load of jobs with different running times with low IPC overhead.
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(run_job, jobs, chunksize=max(1, len(jobs) // (4 * processes))))
+
+
+def format_params(params: dict[str, Any]) -> str:
+    """Returns compact text form of hyperparameters."""
+    return ",".join(f"{key}={value}" for key, value in sorted(params.items()))
+
+
+def summarize(results: Sequence[Result]) -> list[dict[str, Any]]:
+    """Returns mean and std of the metrics over seeds for every (agent, hyperparameters) group."""
+    groups: dict[tuple[str, str], list[Result]] = {}
+
+    for result in results:
+        groups.setdefault((result.agent, result.params), []).append(result)
+
+    summary = []
+
+    for (agent, params), group in groups.items():
+        row: dict[str, Any] = {"agent": agent, "params": params, "seeds": len(group)}
+
+        for metric in ("iterations", "wall_time", "steps_per_sec", "mean_regret", "max_regret"):
+            values = np.array([getattr(result, metric) for result in group], dtype=float)
+            row[metric] = float(values.mean())
+            row[metric + "_std"] = float(values.std())
+
+        summary.append(row)
+
+    return summary
+
+
+def format_summary(summary: Sequence[dict[str, Any]]) -> str:
+    """Returns aligned text table of the summary."""
+    header = ["agent", "params", "seeds", "iterations", "wall time, s", "steps/s", "mean regret", "max regret"]
+    rows = [
+        [
+            row["agent"],
+            row["params"] or "-",
+            str(row["seeds"]),
+            f"{row['iterations']:.0f} ± {row['iterations_std']:.0f}",
+            f"{row['wall_time']:.3f} ± {row['wall_time_std']:.3f}",
+            f"{row['steps_per_sec']:.0f}" if np.isfinite(row["steps_per_sec"]) else "-",
+            f"{row['mean_regret']:.4f} ± {row['mean_regret_std']:.4f}",
+            f"{row['max_regret']:.4f}",
+        ]
+        for row in summary
+    ]
+    widths = [max(len(line[i]) for line in [header] + rows) for i in range(len(header))]
+
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)) for line in [header] + rows)
+
+
+def save_results(results: Sequence[Result], path: str) -> None:
+    """Writes per-run results to a CSV file."""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(Result.__dataclass_fields__))
+        writer.writeheader()
+        writer.writerows(asdict(result) for result in results)
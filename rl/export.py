@@ -0,0 +1,189 @@
+"""Compiled tabular policy export for serving trained GridWorld policies."""
+
+import numpy as np
+from agent import TabularAgent
+from gridworld import Action
+
+# File header: magic, format version, flags of present arrays, grid size and number of actions.
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u2"),
+        ("flags", "<u2"),
+        ("rows", "<u4"),
+        ("cols", "<u4"),
+        ("num_actions", "<u4"),
+    ]
+)
+
+MAGIC = b"GWPL"
+VERSION = 1
+HAS_VALUES = 1
+HAS_PROBABILITIES = 2
+ALIGNMENT = 64
+
+# Action stored for terminal states.
+NO_ACTION = 255
+
+
+class CompiledPolicy:
+    """Compact array form of a trained policy: uint8 greedy actions, optional float32 values and probabilities.
+
+    File layout is the header followed by 64 byte aligned arrays: terminal mask [S] (uint8), actions [S] (uint8),
+    values [S] (float32) and probabilities [S, A] (float32) if present. A loaded policy maps arrays from the file, so
+    loading is O(1) and pages are read on first access.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int],
+        terminal_mask: np.ndarray,
+        actions: np.ndarray,
+        values: np.ndarray | None = None,
+        probabilities: np.ndarray | None = None,
+        num_actions: int = len(Action),
+    ) -> None:
+        self._size = size
+        self._num_actions = num_actions
+        self._terminal_mask = terminal_mask
+        self._actions = actions
+        self._values = values
+        self._probabilities = probabilities
+        self._cum_probabilities: np.ndarray | None = None
+
+    @classmethod
+    def from_agent(
+        cls, agent: TabularAgent, include_values: bool = True, include_probabilities: bool = False
+    ) -> "CompiledPolicy":
+        """Compiles greedy actions (and optionally state values and action probabilities) of a trained agent."""
+        env = agent.env
+        terminal_mask = env.terminal_mask.astype(np.uint8)
+        actions = agent.greedy_actions.astype(np.uint8)
+        actions[env.terminal_mask] = NO_ACTION
+
+        return cls(
+            env.size,
+            terminal_mask,
+            actions,
+            agent.value_table.astype(np.float32) if include_values else None,
+            agent.action_probabilities.astype(np.float32) if include_probabilities else None,
+            len(env.actions),
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompiledPolicy":
+        """Loads compiled policy, arrays are memory mapped unless mmap is False."""
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} is not a compiled policy file")
+
+        rows, cols, num_actions = int(header["rows"]), int(header["cols"]), int(header["num_actions"])
+        shapes = _get_shapes(rows * cols, num_actions, int(header["flags"]))
+        arrays = []
+        offset = _align(HEADER_DTYPE.itemsize)
+
+        for dtype, shape in shapes:
+            if shape is None:
+                arrays.append(None)
+                continue
+
+            if mmap:
+                array = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+            else:
+                array = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+            arrays.append(array)
+            offset = _align(offset + array.nbytes)
+
+        return cls((rows, cols), *arrays, num_actions=num_actions)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Returns grid size."""
+        return self._size
+
+    @property
+    def terminal_mask(self) -> np.ndarray:
+        """Returns [S] terminal states mask."""
+        return self._terminal_mask.astype(bool)
+
+    @property
+    def actions(self) -> np.ndarray:
+        """Returns [S] greedy action indices, NO_ACTION for terminal states."""
+        return self._actions
+
+    @property
+    def values(self) -> np.ndarray | None:
+        """Returns [S] state values if exported."""
+        return self._values
+
+    @property
+    def probabilities(self) -> np.ndarray | None:
+        """Returns [S, A] action probabilities if exported."""
+        return self._probabilities
+
+    def save(self, path: str) -> None:
+        """Saves compiled policy to a file."""
+        flags = (HAS_VALUES if self._values is not None else 0) | (
+            HAS_PROBABILITIES if self._probabilities is not None else 0
+        )
+        header = np.array(
+            [(MAGIC, VERSION, flags, self._size[0], self._size[1], self._num_actions)], dtype=HEADER_DTYPE
+        )
+
+        with open(path, "wb") as file:
+            file.write(header.tobytes())
+
+            for array in (self._terminal_mask, self._actions, self._values, self._probabilities):
+                if array is None:
+                    continue
+
+                file.write(b"\0" * (_align(file.tell()) - file.tell()))
+                file.write(np.ascontiguousarray(array).tobytes())
+
+    def state_indices(self, states: np.ndarray) -> np.ndarray:
+        """Returns flat state indices of [N] flat indices or [N, 2] (row, col) states."""
+        states = np.asarray(states)
+
+        if states.ndim >= 2 and states.shape[-1] == 2:
+            return states[..., 0] * self._size[1] + states[..., 1]
+
+        return states
+
+    def act(self, states: np.ndarray, stochastic: bool = False) -> np.ndarray:
+        """Returns actions for a batch of states (flat indices or (row, col) pairs) in one vectorized lookup.
+
+        Stochastic mode samples from exported probabilities by inverse CDF.
+        """
+        indices = self.state_indices(states)
+
+        if not stochastic:
+            return self._actions[indices]
+
+        if self._probabilities is None:
+            raise ValueError("probabilities were not exported")
+
+        if self._cum_probabilities is None:
+            self._cum_probabilities = np.cumsum(self._probabilities, axis=1)
+
+        cum = self._cum_probabilities[indices]
+        u = np.random.random(indices.shape + (1,)) * cum[..., -1:]
+        actions = np.minimum(np.sum(cum <= u, axis=-1), cum.shape[-1] - 1).astype(np.uint8)
+
+        return np.where(self._terminal_mask[indices] > 0, NO_ACTION, actions)
+
+
+def _align(offset: int) -> int:
+    """Returns offset rounded up to ALIGNMENT."""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _get_shapes(num_states: int, num_actions: int, flags: int) -> list[tuple[type, tuple[int, ...] | None]]:
+    """Returns dtype and shape (None if absent) of every array in file order."""
+    return [
+        (np.uint8, (num_states,)),
+        (np.uint8, (num_states,)),
+        (np.float32, (num_states,) if flags & HAS_VALUES else None),
+        (np.float32, (num_states, num_actions) if flags & HAS_PROBABILITIES else None),
+    ]
@@ -0,0 +1,75 @@
+"""Sparse binary features of GridWorld cells for linear function approximation."""
+
+import numpy as np
+
+
+class TileCoding:
+    """Tile coding over (row, col): num_tilings grids of tile_size x tile_size tiles.
+
+    Tiling t is offset by t · (1, 3) · tile_size / num_tilings cells, so nearby cells share most of their tiles and
+    generalize to each other, while the offsets tell them apart. Every cell activates exactly one tile per tiling,
+    features are binary and only their indices are returned.
+    """
+
+    def __init__(self, size: tuple[int, int], num_tilings: int = 8, tile_size: int = 4) -> None:
+        self._cols = size[1]
+        self._tile_size = tile_size
+        self._tiles = (-(-size[0] // tile_size) + 1, -(-size[1] // tile_size) + 1)  # one extra tile for the offsets
+        tilings = np.arange(num_tilings)
+        self._offsets = np.stack((tilings * 1, tilings * 3)) * tile_size / num_tilings % tile_size
+        self._bases = tilings * self._tiles[0] * self._tiles[1]
+
+    @property
+    def num_features(self) -> int:
+        """Returns size of the feature space."""
+        return len(self._bases) * self._tiles[0] * self._tiles[1]
+
+    @property
+    def num_active(self) -> int:
+        """Returns number of active features of every cell."""
+        return len(self._bases)
+
+    def active(self, states: int | np.ndarray) -> np.ndarray:
+        """Returns [..., num_active] indices of active features of the flat state indices."""
+        rows, cols = np.divmod(np.asarray(states, dtype=np.int64)[..., None], self._cols)
+        tile_rows = ((rows + self._offsets[0]) // self._tile_size).astype(np.int64)
+        tile_cols = ((cols + self._offsets[1]) // self._tile_size).astype(np.int64)
+
+        return self._bases + tile_rows * self._tiles[1] + tile_cols
+
+
+class CoarseCoding(TileCoding):
+    """Coarse grid: a single tiling of cell_size x cell_size tiles, cells of a tile share the same value.
+
+    cell_size=1 gives one-hot (tabular) features.
+    """
+
+    def __init__(self, size: tuple[int, int], cell_size: int = 2) -> None:
+        super().__init__(size, num_tilings=1, tile_size=cell_size)
+
+
+class HashedFeatures:
+    """Features of a base coding hashed into a fixed number of features, memory does not depend on the grid size.
+
+    Base indices are mixed by Fibonacci hashing, distant tiles may collide and share a weight.
+    """
+
+    def __init__(self, base: TileCoding, num_features: int = 4096) -> None:
+        self._base = base
+        self._num_features = num_features
+
+    @property
+    def num_features(self) -> int:
+        """Returns size of the feature space."""
+        return self._num_features
+
+    @property
+    def num_active(self) -> int:
+        """Returns number of active features of every cell."""
+        return self._base.num_active
+
+    def active(self, states: int | np.ndarray) -> np.ndarray:
+        """Returns [..., num_active] indices of active features of the flat state indices."""
+        hashes = self._base.active(states).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+        return ((hashes >> np.uint64(32)) % np.uint64(self._num_features)).astype(np.int64)
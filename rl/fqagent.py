@@ -0,0 +1,150 @@
+"""Fitted Q Iteration Agent"""
+
+from typing import Iterator
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from gridworld import Action, GridWorld, State
+from offline import TransitionStore
+
+
+class FittedQAgent(TabularAgent):
+    """Offline agent learning Q from a fixed store of logged transitions, without interacting with the environment.
+
+    With batch_size=None every sweep is one fitted Q iteration: Q(s, a) is set to the mean target
+    r + γ max_a' Q(s', a') of all logged transitions of the pair, accumulated chunk by chunk with np.bincount, which is
+    value iteration on the empirical model of the data. Otherwise a sweep is an epoch of batch Q-learning: minibatches
+    of batch_size random transitions are applied as one array update with learning rate alpha.
+
+    Only actions present in the data are trusted: the max over next actions and greedy actions skip unlogged pairs, a
+    state without logged actions has value 0.
+    """
+
+    is_planner = True
+
+    def __init__(
+        self,
+        env: GridWorld,
+        store: TransitionStore,
+        alpha: float = 0.5,
+        gamma: float = 0.99,
+        batch_size: int | None = None,
+        theta: float = 1e-6,
+        max_iters: int = 1000,
+        chunk_size: int = 1 << 20,
+    ) -> None:
+        self._env = env
+        self._store = store
+        self._alpha = alpha
+        self._gamma = gamma
+        self._batch_size = batch_size
+        self._theta = theta
+        self._max_iters = max_iters
+        self._chunk_size = chunk_size
+        self._q = np.zeros((env.num_states, len(env.actions)))
+
+        # Number of logged transitions of each state-action pair
+        self._counts = np.zeros(self._q.size)
+
+        for chunk in store.chunks(chunk_size):
+            self._counts += np.bincount(self._pair_indices(chunk), minlength=self._q.size)
+
+        self._logged = self._counts.reshape(self._q.shape) > 0
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of sweeps, iterations and transition updates after every sweep over the data."""
+
+        updates = 0
+
+        for i in range(self._max_iters):
+            previous = self._q.copy()
+            updates += self._sweep()
+
+            yield 1, i + 1, updates
+
+            if np.max(np.abs(self._q - previous), initial=0.0) < self._theta:
+                break
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns [S, A] quality of state-action pairs, 0 for pairs without logged transitions."""
+
+        return self._q
+
+    @property
+    def quality(self) -> dict[State, dict[Action, float]]:
+        """Returns the quality of state-action pairs."""
+
+        return utils.quality_to_dict(self._q, self._env)
+
+    @property
+    def value_table(self) -> np.ndarray:
+        """Returns [S] state values: max over logged actions, 0 for states without them."""
+
+        return self._cached("value_table", self._calc_values)
+
+    @property
+    def logged(self) -> np.ndarray:
+        """Returns [S, A] mask of state-action pairs with logged transitions."""
+
+        return self._logged
+
+    def _sweep(self) -> int:
+        """Applies one fitted Q iteration or one epoch of minibatch updates, returns number of transitions used."""
+
+        q = self._q.reshape(-1)
+
+        if self._batch_size is None:
+            values = self._calc_values()
+            sums = np.zeros(q.size)
+
+            for chunk in self._store.chunks(self._chunk_size):
+                targets = self._calc_targets(chunk, values[chunk["next_state"]])
+                sums += np.bincount(self._pair_indices(chunk), weights=targets, minlength=q.size)
+
+            logged = self._counts > 0
+            q[logged] = sums[logged] / self._counts[logged]
+
+            return len(self._store)
+
+        num_batches = max(len(self._store) // self._batch_size, 1)
+
+        for _ in range(num_batches):
+            batch = self._sample(self._batch_size)
+            indices = self._pair_indices(batch)
+            targets = self._calc_targets(batch, self._calc_values(batch["next_state"]))
+
+            # All updates of the minibatch are computed from the same Q values, a duplicated pair is updated once.
+            q[indices] += self._alpha * (targets - q[indices])
+
+        return num_batches * self._batch_size
+
+    def _sample(self, size: int) -> dict[str, np.ndarray]:
+        """Returns columns of uniformly sampled logged transitions, sorted indices keep memory mapped reads local."""
+
+        indices = np.sort(np.random.randint(0, len(self._store), size=size))
+
+        return {name: self._store[name][indices] for name in ("state", "action", "reward", "next_state", "done")}
+
+    def _pair_indices(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        """Returns flat state-action pair indices of the transitions."""
+
+        return columns["state"].astype(np.int64) * len(self._env.actions) + columns["action"]
+
+    def _calc_targets(self, columns: dict[str, np.ndarray], next_values: np.ndarray) -> np.ndarray:
+        """Returns r + γ V(s') targets of the transitions given values of their next states."""
+
+        return columns["reward"] + self._gamma * next_values * ~columns["done"]
+
+    def _calc_values(self, states: np.ndarray | None = None) -> np.ndarray:
+        """Returns max of Q over logged actions of the states (all by default), 0 for states without them."""
+
+        q, logged = (self._q, self._logged) if states is None else (self._q[states], self._logged[states])
+
+        return np.where(logged.any(axis=1), np.max(np.where(logged, q, -np.inf), axis=1), 0.0)
+
+    def _calc_greedy_actions(self) -> np.ndarray:
+        """Computes [S] greedy action index of each state over logged actions."""
+
+        return np.argmax(np.where(self._logged, self._q, -np.inf), axis=1)
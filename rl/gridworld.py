@@ -3,6 +3,8 @@
 from dataclasses import dataclass
 from enum import IntEnum
 
+import numpy as np
+
 State = tuple[int, int]
 
 
@@ -24,8 +26,58 @@ class Transition:
     reward: float
 
 
+@dataclass(frozen=True)
+class Dynamics:
+    """Stochastic dynamics of the grid world.
+
+    The chosen action is executed with probability 1 - slip, otherwise one of the two perpendicular actions is executed
+    with equal probability. Explicit kernels ([A, A] or per cell [rows, cols, A, A] probabilities of the executed action
+    given the chosen one) replace slip. After the move, wind ([cols] strengths) pushes the agent up by the strength of
+    the column it left, until a wall or the grid border. With wind_noise, the strength of windy columns is one more or
+    one less with probability wind_noise / 2 each.
+    """
+
+    slip: float = 0.0
+    wind: np.ndarray | None = None
+    wind_noise: float = 0.0
+    kernels: np.ndarray | None = None
+
+    def get_kernels(self, size: tuple[int, int], num_actions: int) -> np.ndarray:
+        """Returns [S, A, A] probabilities of the executed action given the chosen one for every state."""
+        if self.kernels is not None:
+            kernels = np.asarray(self.kernels, dtype=float)
+
+            return np.broadcast_to(kernels, size + (num_actions, num_actions)).reshape(-1, num_actions, num_actions)
+
+        # Actions are ordered clockwise, so perpendicular actions are the neighbours in the cyclic order
+        actions = np.arange(num_actions)
+        kernel = np.zeros((num_actions, num_actions))
+        kernel[actions, actions] = 1.0 - self.slip
+        kernel[actions, (actions + 1) % num_actions] += self.slip / 2
+        kernel[actions, (actions - 1) % num_actions] += self.slip / 2
+
+        return np.broadcast_to(kernel, (size[0] * size[1], num_actions, num_actions))
+
+    def get_wind_offsets(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns wind strength offsets and their probabilities."""
+        if self.wind is None or self.wind_noise == 0.0:
+            return np.zeros(1, dtype=np.int64), np.ones(1)
+
+        return np.array([0, 1, -1]), np.array([1.0 - self.wind_noise, self.wind_noise / 2, self.wind_noise / 2])
+
+
 class GridWorld:
-    """A simple grid world environment for reinforcement learning."""
+    """A simple grid world environment for reinforcement learning.
+
+    Besides terminal states given as a tuple, the world can be described by [rows, cols] arrays (see maps.py): walls,
+    terminal mask and cell rewards (reward for entering the cell). Walls can not be entered, moves into a wall or off
+    the grid leave the agent in place. Wall cells are unreachable and are treated as absorbing (terminal) states, so
+    agents never start or learn there.
+
+    Transitions are stochastic with the given Dynamics (slip, wind, per-cell kernels). The full distributions are kept
+    as [S, A, K] outcome arrays consumed by planners, model-free agents sample them through step and sample_transitions
+    using Walker's alias tables built for all state-action pairs at once.
+    """
 
     def __init__(
         self,
@@ -33,17 +85,99 @@ class GridWorld:
         terminal_states: tuple[State, ...] = ((3, 3),),
         step_reward: float = 0.0,
         terminal_reward: float = 1.0,
+        walls: np.ndarray | None = None,
+        terminals: np.ndarray | None = None,
+        cell_rewards: np.ndarray | None = None,
+        dynamics: Dynamics | None = None,
     ) -> None:
         self._size = size
-        self._terminal_states = set(terminal_states)
         self._step_reward = step_reward
         self._terminal_reward = terminal_reward
 
+        if terminals is None:
+            terminals = np.zeros(size, dtype=bool)
+            terminals[tuple(np.array(terminal_states, dtype=np.int64).reshape(-1, 2).T)] = True
+
+        self._walls = np.zeros(size, dtype=bool) if walls is None else np.array(walls, dtype=bool)
+        self._terminals = np.asarray(terminals, dtype=bool) & ~self._walls
+        self._absorbing = self._terminals | self._walls
+        self._cell_rewards = (
+            np.where(self._terminals, terminal_reward, step_reward)
+            if cell_rewards is None
+            else np.array(cell_rewards, dtype=float)
+        )
+        self._dynamics = dynamics or Dynamics()
+        self._tables: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._outcomes: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._alias_tables: tuple[np.ndarray, np.ndarray] | None = None
+
+        # Uniform numbers for scalar sampling are drawn in blocks, scaled by the number of outcomes
+        self._uniforms = np.zeros(0)
+        self._position = 0
+
     @property
     def size(self) -> tuple[int, int]:
         """Returns the size of the grid world."""
         return self._size
 
+    @property
+    def num_states(self) -> int:
+        """Returns the number of states in the grid world."""
+        return self._size[0] * self._size[1]
+
+    def state_index(self, state: State) -> int:
+        """Returns the flat index of the given state."""
+        return state[0] * self._size[1] + state[1]
+
+    def index_state(self, index: int) -> State:
+        """Returns the state for the given flat index."""
+        return divmod(int(index), self._size[1])
+
+    @property
+    def next_state_table(self) -> np.ndarray:
+        """Returns [S, A] array of next state indices, the most likely ones in stochastic worlds."""
+        return self._get_tables()[0]
+
+    @property
+    def reward_table(self) -> np.ndarray:
+        """Returns [S, A] array of rewards, expected rewards in stochastic worlds."""
+        return self._get_tables()[1]
+
+    @property
+    def dynamics(self) -> Dynamics:
+        """Returns transition dynamics."""
+        return self._dynamics
+
+    @property
+    def is_stochastic(self) -> bool:
+        """Returns True if some action has more than one outcome."""
+        return self._get_outcomes()[0].shape[2] > 1
+
+    @property
+    def outcome_probabilities(self) -> np.ndarray:
+        """Returns [S, A, K] probabilities of K transition outcomes of every state-action pair."""
+        return self._get_outcomes()[0]
+
+    @property
+    def outcome_states(self) -> np.ndarray:
+        """Returns [S, A, K] next state indices of the transition outcomes."""
+        return self._get_outcomes()[1]
+
+    @property
+    def outcome_rewards(self) -> np.ndarray:
+        """Returns [S, A, K] rewards of the transition outcomes."""
+        return self._get_outcomes()[2]
+
+    @property
+    def terminal_mask(self) -> np.ndarray:
+        """Returns [S] boolean array marking absorbing states: terminal states and walls."""
+        return self._get_tables()[2]
+
+    @property
+    def wall_mask(self) -> np.ndarray:
+        """Returns [S] boolean array marking walls."""
+        return self._walls.reshape(-1)
+
     @property
     def states(self) -> list[State]:
         """Returns a list of all states in the grid world."""
@@ -55,11 +189,15 @@ class GridWorld:
         return list(Action)
 
     def is_terminal(self, state: State) -> bool:
-        """Returns True if the given state is a terminal state."""
-        return state in self._terminal_states
+        """Returns True if the given state is a terminal state (or a wall)."""
+        return bool(self._absorbing[state])
+
+    def is_wall(self, state: State) -> bool:
+        """Returns True if the given state is a wall."""
+        return bool(self._walls[state])
 
     def next_state(self, state: State, action: Action) -> State:
-        """Returns the next state given the current state and action."""
+        """Returns the next state given the current state and action, without slip and wind of stochastic dynamics."""
         if self.is_terminal(state):
             return state
 
@@ -74,32 +212,236 @@ class GridWorld:
         elif action == Action.LEFT:
             c = max(c - 1, 0)
 
+        if self._walls[r, c]:
+            return state
+
         return (r, c)
 
     def reward(self, cur_state: State, action: Action, next_state: State) -> float:
         """
         Returns the reward for taking the given action in the current state and transitioning to the next state.
         This is general case where the reward can depend on the current state, action, and next state.
-        In this simple grid world, we will return a fixed step reward for non-terminal transitions and the terminal
-        reward for transitions into terminal states.
+        In this simple grid world, we will return the reward of the entered cell: by default a fixed step reward for
+        non-terminal transitions and the terminal reward for transitions into terminal states.
         """
         _ = action  # Unused in this simple implementation, but included for generality.
 
         if self.is_terminal(cur_state):
             return 0.0
 
-        if self.is_terminal(next_state):
-            return self._terminal_reward
-
-        return self._step_reward
+        return float(self._cell_rewards[next_state])
 
     def get_transition(self, state: State, action: Action) -> list[Transition]:
         """Returns a list of possible transitions for the given state and action."""
+        index = self.state_index(state)
+        probabilities, next_states, rewards = self._get_outcomes()
+        transitions: dict[int, Transition] = {}
+
+        # Outcomes leading to the same state (e.g. slips into a wall and staying in place) are merged, rewards only
+        # depend on the entered cell.
+        for probability, next_state, reward in zip(
+            probabilities[index, action].tolist(), next_states[index, action].tolist(), rewards[index, action].tolist()
+        ):
+            if probability == 0.0:
+                continue
+
+            if next_state in transitions:
+                probability += transitions[next_state].probability
+
+            transitions[next_state] = Transition(probability, self.index_state(next_state), reward)
+
+        return list(transitions.values())
+
+    def step(self, state: int, action: int) -> tuple[int, float]:
+        """Samples next state index and reward of taking the action index in the state index."""
+        if self._outcomes is None:
+            self._get_outcomes()
+
+        if self._alias_tables is None:
+            next_states, rewards, _ = self._get_tables()
+
+            return next_states[state, action], rewards[state, action]
+
+        # One uniform number selects both the alias table column and the alias: O(1) per sample
+        if self._position == len(self._uniforms):
+            self._uniforms = np.random.random(4096) * self._alias_tables[0].shape[2]
+            self._position = 0
+
+        u = self._uniforms[self._position]
+        self._position += 1
+        k = int(u)
+
+        if u - k >= self._alias_tables[0][state, action, k]:
+            k = self._alias_tables[1][state, action, k]
+
+        return self._outcomes[1][state, action, k], self._outcomes[2][state, action, k]
+
+    def sample_transitions(self, states: np.ndarray, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized step: samples next state indices and rewards of arrays of state and action indices."""
+        _, next_states, rewards = self._get_outcomes()
+
+        if self._alias_tables is None:
+            next_states, rewards, _ = self._get_tables()
+
+            return next_states[states, actions], rewards[states, actions]
+
+        probabilities, aliases = self._alias_tables
+        u = np.random.random(np.shape(states)) * probabilities.shape[2]
+        k = u.astype(np.int64)
+        k = np.where(u - k < probabilities[states, actions, k], k, aliases[states, actions, k])
+
+        return next_states[states, actions, k], rewards[states, actions, k]
+
+    def calc_action_values(
+        self, values: np.ndarray, gamma: float, states: int | np.ndarray | None = None
+    ) -> np.ndarray:
+        """Returns [S, A] expected action values Σ p · (r + γ · V(s')) of all states, or of the given state indices."""
+        probabilities, next_states, rewards = self._get_outcomes()
+
+        if states is not None:
+            probabilities, next_states, rewards = probabilities[states], next_states[states], rewards[states]
+
+        if probabilities.shape[-1] == 1:
+            return rewards[..., 0] + gamma * values[next_states[..., 0]]
+
+        return np.sum(probabilities * (rewards + gamma * values[next_states]), axis=-1)
+
+    def _get_tables(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Builds array form of the environment dynamics used by vectorized agents."""
+
+        if self._tables is not None:
+            return self._tables
+
+        probabilities, next_states, rewards = self._get_outcomes()
+        likely = np.argmax(probabilities, axis=2)[:, :, None]
+        tables = (
+            np.take_along_axis(next_states, likely, axis=2)[:, :, 0],
+            np.sum(probabilities * rewards, axis=2),
+            self._absorbing.reshape(-1).copy(),
+        )
+
+        for table in tables:
+            table.flags.writeable = False
+
+        self._tables = tables
+
+        return self._tables
+
+    def _get_outcomes(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Builds [S, A, K] probabilities, next states and rewards of transition outcomes and their alias tables."""
+
+        if self._outcomes is not None:
+            return self._outcomes
+
+        num_actions = len(Action)
+        states = np.arange(self.num_states)
+        moves = self._calc_moves()
+        dynamics = self._dynamics
+
+        if dynamics.slip == 0.0 and dynamics.kernels is None and dynamics.wind is None:
+            probabilities = np.ones((self.num_states, num_actions, 1))
+            next_states = moves[:, :, None]
+        else:
+            # Outcome (d, w): executed action (a + d) mod A, w-th wind strength offset. Executed actions are relative
+            # to the chosen one, so outcomes never taken by any state (e.g. the opposite action on slip) are dropped.
+            executed = (np.arange(num_actions)[:, None] + np.arange(num_actions)[None, :]) % num_actions
+            kernels = np.take_along_axis(dynamics.get_kernels(self._size, num_actions), executed[None], axis=2)
+            offsets, offset_probabilities = dynamics.get_wind_offsets()
+            wind = np.zeros(self._size[1], dtype=np.int64) if dynamics.wind is None else np.asarray(dynamics.wind)
+            strengths = wind[states % self._size[1]]
+            windy = strengths > 0
+
+            wind_probabilities = np.where(windy[:, None], offset_probabilities, offsets == 0)
+            offset_strengths = np.maximum(strengths[:, None] + offsets * windy[:, None], 0)
+            pushed = self._push(moves[:, :, None], offset_strengths[:, None])
+
+            probabilities = (kernels[:, :, :, None] * wind_probabilities[:, None, None, :]).reshape(
+                self.num_states, num_actions, -1
+            )
+            next_states = pushed[:, executed].reshape(self.num_states, num_actions, -1)
+
+            # Outcomes which no state-action pair can take are removed
+            used = np.any(probabilities > 0.0, axis=(0, 1))
+            probabilities, next_states = probabilities[:, :, used], next_states[:, :, used]
+
+            if np.all(probabilities.max(axis=2) == 1.0):
+                likely = np.argmax(probabilities, axis=2)[:, :, None]
+                probabilities = np.ones((self.num_states, num_actions, 1))
+                next_states = np.take_along_axis(next_states, likely, axis=2)
+
+        # terminal states are absorbing: the first outcome stays in place with zero reward
+        absorbing = self._absorbing.reshape(-1)
+        probabilities[absorbing] = 0.0
+        probabilities[absorbing, :, 0] = 1.0
+        next_states = np.where(absorbing[:, None, None], states[:, None, None], next_states)
+
+        rewards = np.where(absorbing[:, None, None], 0.0, self._cell_rewards.reshape(-1)[next_states])
+
+        for table in (probabilities, next_states, rewards):
+            table.flags.writeable = False
+
+        self._outcomes = (probabilities, next_states, rewards)
+
+        if probabilities.shape[2] > 1:
+            self._alias_tables = _build_alias_tables(probabilities)
+
+        return self._outcomes
+
+    def _calc_moves(self) -> np.ndarray:
+        """Returns [S, A] next states of executed actions, moves into walls leave the agent in place."""
+        rows, cols = np.divmod(np.arange(self.num_states), self._size[1])
+
+        # Same moves as in next_state, computed for all states at once. Columns are ordered by Action values.
+        next_rows = np.stack(
+            [np.maximum(rows - 1, 0), rows, np.minimum(rows + 1, self._size[0] - 1), rows],
+            axis=1,
+        )
+        next_cols = np.stack(
+            [cols, np.minimum(cols + 1, self._size[1] - 1), cols, np.maximum(cols - 1, 0)],
+            axis=1,
+        )
+        next_states = next_rows * self._size[1] + next_cols
+
+        return np.where(self._walls.reshape(-1)[next_states], np.arange(self.num_states)[:, None], next_states)
+
+    def _push(self, states: np.ndarray, strengths: np.ndarray) -> np.ndarray:
+        """Returns states pushed up by strengths cells, walls and the grid border stop the push."""
+        walls = self._walls.reshape(-1)
+        states, strengths = np.broadcast_arrays(states, strengths)
+        states = states.copy()
+
+        for step in range(int(strengths.max(initial=0))):
+            up = states - self._size[1]
+            push = (strengths > step) & (up >= 0)
+            push[push] = ~walls[up[push]]
+            states[push] = up[push]
+
+        return states
+
+
+def _build_alias_tables(probabilities: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Builds Walker's alias tables of [..., K] distributions at once: alias probabilities and aliases.
+
+    Vose's method runs over all distributions in lockstep: every iteration tops up one small column of every row by one
+    of its large columns, so K - 1 vectorized iterations build all tables.
+    """
+    num_outcomes = probabilities.shape[-1]
+    scaled = probabilities.reshape(-1, num_outcomes) * num_outcomes
+    alias_probabilities = np.ones_like(scaled)
+    aliases = np.tile(np.arange(num_outcomes, dtype=np.int8), (len(scaled), 1))
+    done = np.zeros(scaled.shape, dtype=bool)
+
+    for _ in range(num_outcomes - 1):
+        small, large = ~done & (scaled < 1.0), ~done & (scaled >= 1.0)
+        rows = np.flatnonzero(small.any(axis=1) & large.any(axis=1))
+
+        if rows.size == 0:
+            break
 
-        next_state = self.next_state(state, action)
-        reward = self.reward(state, action, next_state)
+        less, more = np.argmax(small[rows], axis=1), np.argmax(large[rows], axis=1)
+        alias_probabilities[rows, less] = scaled[rows, less]
+        aliases[rows, less] = more
+        scaled[rows, more] -= 1.0 - scaled[rows, less]
+        done[rows, less] = True
 
-        # In this simple grid world, we assume deterministic transitions, so we return a single
-        # transition with probability 1.0. In a more complex environment, this method could return
-        # multiple transitions with different probabilities.
-        return [Transition(1.0, next_state, reward)]
+    return alias_probabilities.reshape(probabilities.shape), aliases.reshape(probabilities.shape)
@@ -0,0 +1,146 @@
+"""Linear Function Approximation Agent"""
+
+from typing import Iterator
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from common import LinearMethod
+from features import HashedFeatures, TileCoding
+from gridworld import GridWorld
+from sampling import StartStateSampler
+
+
+class LinearAgent(TabularAgent):
+    """Semi-gradient TD(0), SARSA or Q-learning agent with values linear in sparse binary features of the cells.
+
+    V(s) = Σ w[f] and Q(s, a) = Σ w[f, a] over the active features f of s, so training memory is the fixed
+    [F] ([F, A]) weight array and every step reads and updates only the num_active weights of the visited state.
+    Step size α is divided by the number of active features. Terminal states have value 0.
+
+    The [S] or [S, A] table is materialized from the weights only when asked for (evaluation, policy, snapshots).
+    """
+
+    def __init__(
+        self,
+        env: GridWorld,
+        features: TileCoding | HashedFeatures | None = None,
+        method: LinearMethod = LinearMethod.Q_LEARNING,
+        alpha: float = 0.1,
+        gamma: float = 0.99,
+        epsilon: float = 0.25,
+        max_steps: int = 100,
+        max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
+    ) -> None:
+        self._env = env
+        self._features = features or TileCoding(env.size)
+        self._method = method
+        self._alpha = alpha / self._features.num_active
+        self._gamma = gamma
+        self._epsilon = epsilon
+        self._max_steps = max_steps
+        self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
+
+        num_features = self._features.num_features
+        self._weights = np.zeros(num_features if method == LinearMethod.TD else (num_features, len(env.actions)))
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        env_step, terminals = self._env.step, self._env.terminal_mask
+        active, weights = self._features.active, self._weights
+
+        for _ in range(self._max_iters):
+            state, action = self._start_sampler.sample()
+            features = active(state)
+            episode_return = 0.0
+            visited = []
+
+            if action < 0 and self._method == LinearMethod.TD:
+                action = self._sample_lookahead_action(state)
+            elif action < 0:
+                action = utils.sample_epsilon_greedy_action(weights[features].sum(axis=0), self._epsilon)
+
+            for _ in range(self._max_steps):
+                if terminals[state]:
+                    break
+
+                next_state, reward = env_step(state, action)
+                episode_return += reward
+                next_features = active(next_state)
+                done = terminals[next_state]
+                next_action = -1
+
+                # Terminal features may be shared with neighbouring cells, so terminal values are masked, not learned
+                if self._method == LinearMethod.TD:
+                    next_value = 0.0 if done else weights[next_features].sum()
+                    weights[features] += self._alpha * (reward + self._gamma * next_value - weights[features].sum())
+                else:
+                    next_q = weights[next_features].sum(axis=0)
+
+                    if not done:
+                        next_action = utils.sample_epsilon_greedy_action(next_q, self._epsilon)
+
+                    if done:
+                        next_value = 0.0
+                    elif self._method == LinearMethod.SARSA:
+                        next_value = next_q[next_action]
+                    else:
+                        next_value = np.max(next_q)
+
+                    # A feature hashed twice into the same state is updated once, as duplicated indices of replays
+                    q = weights[features, action].sum()
+                    weights[features, action] += self._alpha * (reward + self._gamma * next_value - q)
+
+                visited.append(state)
+                state, features = next_state, next_features
+                action = self._sample_lookahead_action(state) if self._method == LinearMethod.TD else next_action
+
+            self._start_sampler.update(visited)
+
+            iters += len(visited)
+            updates += len(visited)
+            self._last_return = episode_return
+
+            yield 1, iters, updates
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Returns [F] or [F, A] feature weights."""
+
+        return self._weights
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns [S] state values (TD) or [S, A] quality of state-action pairs computed from the weights."""
+
+        return self._cached("table", self._calc_table)
+
+    def _calc_table(self, chunk_size: int = 1 << 16) -> np.ndarray:
+        """Computes table of all states chunk by chunk, so active feature indices of all states are never stored."""
+
+        table = np.zeros((self._env.num_states,) + self._weights.shape[1:])
+
+        for start in range(0, self._env.num_states, chunk_size):
+            states = np.arange(start, min(start + chunk_size, self._env.num_states))
+            table[states] = self._weights[self._features.active(states)].sum(axis=1)
+
+        table[self._env.terminal_mask] = 0.0
+
+        return table
+
+    def _sample_lookahead_action(self, state: int) -> int:
+        """Selects epsilon-greedy action by one-step lookahead of state values through the environment model."""
+
+        next_states = self._env.outcome_states[state]
+        next_values = self._weights[self._features.active(next_states)].sum(axis=-1)
+        next_values[self._env.terminal_mask[next_states]] = 0.0
+        action_values = np.sum(
+            self._env.outcome_probabilities[state] * (self._env.outcome_rewards[state] + self._gamma * next_values),
+            axis=1,
+        )
+
+        return utils.sample_epsilon_greedy_action(action_values, self._epsilon)
@@ -0,0 +1,179 @@
+"""GridWorld maps: procedural generators and text / .npy map loaders.
+
+A map is a [rows, cols] uint8 array of cell codes. It is converted to GridWorld arrays (walls, terminals, cell
+rewards) with vectorized comparisons, so large maps never go through per-cell Python objects.
+"""
+
+import numpy as np
+from gridworld import GridWorld
+
+EMPTY = 0
+WALL = 1
+GOAL = 2  # terminal cell with terminal reward
+TRAP = 3  # terminal cell with trap reward
+
+# Text map characters of the cell codes
+CHARS = {EMPTY: ".", WALL: "#", GOAL: "T", TRAP: "X"}
+
+# Lookup table from text byte to cell code, unknown characters are empty cells
+_CODES = np.full(256, EMPTY, dtype=np.uint8)
+
+for _code, _char in CHARS.items():
+    _CODES[ord(_char)] = _code
+
+
+def make_world(
+    cells: np.ndarray,
+    step_reward: float = 0.0,
+    terminal_reward: float = 1.0,
+    trap_reward: float = -1.0,
+    cell_rewards: np.ndarray | None = None,
+) -> GridWorld:
+    """Returns GridWorld of the map. Explicit cell_rewards override rewards derived from the cell codes."""
+    cells = np.asarray(cells)
+
+    if cell_rewards is None:
+        cell_rewards = np.select([cells == GOAL, cells == TRAP], [terminal_reward, trap_reward], step_reward)
+
+    return GridWorld(
+        cells.shape,
+        (),
+        step_reward,
+        terminal_reward,
+        walls=cells == WALL,
+        terminals=(cells == GOAL) | (cells == TRAP),
+        cell_rewards=cell_rewards,
+    )
+
+
+def parse_text(text: str | bytes) -> np.ndarray:
+    """Returns cell codes of a text map: one line per row, characters of CHARS, other characters are empty cells."""
+    data = text.encode() if isinstance(text, str) else text
+    lines = data.strip(b"\n").split(b"\n")
+    cols = max(len(line.rstrip(b"\r")) for line in lines)
+
+    # All rows are padded to the same width and converted with one table lookup.
+    buffer = np.frombuffer(b"".join(line.rstrip(b"\r").ljust(cols, b".") for line in lines), dtype=np.uint8)
+
+    return _CODES[buffer].reshape(len(lines), cols)
+
+
+def format_text(cells: np.ndarray) -> str:
+    """Returns text map of the cell codes."""
+    chars = np.array([ord(CHARS[code]) for code in sorted(CHARS)], dtype=np.uint8)
+    lines = chars[np.asarray(cells)]
+
+    return "\n".join(line.tobytes().decode() for line in lines)
+
+
+def load_map(path: str) -> np.ndarray:
+    """Loads cell codes from .npy file (memory mapped) or a text map file."""
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+
+    with open(path, "rb") as file:
+        return parse_text(file.read())
+
+
+def save_map(cells: np.ndarray, path: str) -> None:
+    """Saves cell codes to .npy file or a text map file."""
+    if path.endswith(".npy"):
+        np.save(path, np.asarray(cells, dtype=np.uint8))
+        return
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(format_text(cells) + "\n")
+
+
+def place_terminals(
+    cells: np.ndarray, num_goals: int = 1, num_traps: int = 0, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    """Places goals and traps on random empty cells, returns the map."""
+    rng = rng or np.random.default_rng()
+    empty = np.flatnonzero(cells.reshape(-1) == EMPTY)
+    chosen = rng.choice(empty, size=num_goals + num_traps, replace=False)
+    cells.reshape(-1)[chosen[:num_goals]] = GOAL
+    cells.reshape(-1)[chosen[num_goals:]] = TRAP
+
+    return cells
+
+
+def random_obstacles(
+    size: tuple[int, int], density: float = 0.2, num_goals: int = 1, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    """Returns map with independently placed walls and goals on random empty cells.
+
+    Walls may cut off regions, states there just never reach a goal.
+    """
+    rng = rng or np.random.default_rng()
+    cells = np.where(rng.random(size) < density, WALL, EMPTY).astype(np.uint8)
+
+    return place_terminals(cells, num_goals, rng=rng)
+
+
+def recursive_maze(size: tuple[int, int], rng: np.random.Generator | None = None) -> np.ndarray:
+    """Returns perfect maze built by recursive division with the goal in the bottom right corridor cell.
+
+    Corridors are on even rows and columns, walls on odd ones. Every chamber is split by a wall with one door, chambers
+    are kept on an explicit stack, and every wall is drawn by one slice assignment.
+    """
+    rng = rng or np.random.default_rng()
+    rows, cols = size
+    cells = np.zeros(size, dtype=np.uint8)
+    last_row, last_col = (rows - 1) // 2 * 2, (cols - 1) // 2 * 2
+    chambers = [(0, 0, last_row, last_col)]
+
+    while chambers:
+        r0, c0, r1, c1 = chambers.pop()
+        height, width = r1 - r0, c1 - c0
+
+        if height < 2 and width < 2:
+            continue
+
+        if height > width or (height == width and rng.random() < 0.5):
+            wall = r0 + 1 + 2 * int(rng.integers(height // 2))
+            cells[wall, c0 : c1 + 1] = WALL
+            cells[wall, c0 + 2 * int(rng.integers(width // 2 + 1))] = EMPTY
+            chambers += [(r0, c0, wall - 1, c1), (wall + 1, c0, r1, c1)]
+        else:
+            wall = c0 + 1 + 2 * int(rng.integers(width // 2))
+            cells[r0 : r1 + 1, wall] = WALL
+            cells[r0 + 2 * int(rng.integers(height // 2 + 1)), wall] = EMPTY
+            chambers += [(r0, c0, r1, wall - 1), (r0, wall + 1, r1, c1)]
+
+    # Even sized grids have an extra row (column) beyond the last corridor, it is walled off.
+    cells[last_row + 1 :, :] = WALL
+    cells[:, last_col + 1 :] = WALL
+    cells[last_row, last_col] = GOAL
+
+    return cells
+
+
+def rooms(
+    size: tuple[int, int], room_size: int = 8, num_goals: int = 1, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    """Returns map of room_size rooms separated by walls with one random door in every wall segment."""
+    rng = rng or np.random.default_rng()
+    rows, cols = size
+    cells = np.zeros(size, dtype=np.uint8)
+    wall_rows = np.arange(room_size, rows, room_size + 1)
+    wall_cols = np.arange(room_size, cols, room_size + 1)
+    cells[wall_rows, :] = WALL
+    cells[:, wall_cols] = WALL
+
+    # Door offsets inside every room side: segments of wall rows are indexed by (wall row, room column) and vice versa
+    room_rows = np.arange(0, rows, room_size + 1)
+    room_cols = np.arange(0, cols, room_size + 1)
+
+    if len(wall_rows):
+        offsets = rng.integers(room_size, size=(len(wall_rows), len(room_cols)))
+        door_cols = np.minimum(room_cols[None, :] + offsets, cols - 1)
+        cells[np.repeat(wall_rows, len(room_cols)), door_cols.reshape(-1)] = EMPTY
+
+    if len(wall_cols):
+        offsets = rng.integers(room_size, size=(len(room_rows), len(wall_cols)))
+        door_rows = np.minimum(room_rows[:, None] + offsets, rows - 1)
+        cells[door_rows.reshape(-1), np.tile(wall_cols, len(room_rows))] = EMPTY
+
+    # Doors never open at wall crossings, as door offsets are inside rooms.
+    return place_terminals(cells, num_goals, rng=rng)
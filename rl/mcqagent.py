@@ -1,23 +1,15 @@
 """Monte Carlo Agent for Reinforcement Learning"""
 
-import random
-from collections import defaultdict
-from dataclasses import dataclass
+from typing import Iterator
 
+import numpy as np
 import utils
+from agent import TabularAgent
 from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
 
 
-@dataclass(frozen=True)
-class EpisodeItem:
-    """Represents an item in an episode."""
-
-    state: State
-    action: Action
-    reward: float
-
-
-class MonteCarloQAgent:
+class MonteCarloQAgent(TabularAgent):
     """Monte Carlo Q agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -28,6 +20,8 @@ class MonteCarloQAgent:
         epsilon: float = 0.25,
         max_steps: int = 100,
         max_iters: int = 1000,
+        batch_size: int = 1,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._alpha = alpha
@@ -35,91 +29,68 @@ class MonteCarloQAgent:
         self._epsilon = epsilon
         self._max_steps = max_steps
         self._max_iters = max_iters
-        self._q: dict[State, dict[Action, float]] = defaultdict(lambda: defaultdict(float))
-        self._state_counts: dict[State, int] = defaultdict(int)
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._batch_size = batch_size
+        self._q = np.zeros((env.num_states, len(env.actions)))
+        self._state_counts = np.zeros(env.num_states, dtype=np.int64)
 
-        # we can store only best action for each state and implement e-greedy policy in _generate_episode as:
+        # we can store only best action for each state and implement e-greedy policy in generate_episodes as:
         # random(epsilon) -> random action, else -> best action. But for generality, we will store the probabilities of
         # taking each action in each state, which allows us to implement more complex policies if needed.
-        self._policy: dict[State, dict[Action, float]] = {}
-
-    def train(self) -> tuple[int, dict[State, float], dict[State, Action]]:
-        """Trains agent."""
-        iters = 0
-
-        for _ in range(self._max_iters):
-            steps, episode = self._generate_episode()
-            iters += steps
-
-            g = 0.0
-
-            for t in reversed(range(len(episode))):
-                cur_item = episode[t]
-                g = self._gamma * g + cur_item.reward
-
-                if not any((item.state == cur_item.state and item.action == cur_item.action) for item in episode[:t]):
-                    self._q[cur_item.state][cur_item.action] += self._alpha * (
-                        g - self._q[cur_item.state][cur_item.action]
-                    )
-
-                    q_actions = self._q[cur_item.state]
-                    best_action = max(q_actions, key=q_actions.get)
-
-                    self._policy[cur_item.state] = utils.calc_action_probabilities(
-                        self._env.actions, best_action, self._epsilon
-                    )
-
-        return iters
+        self._policy = np.full((env.num_states, len(env.actions)), 1.0 / len(env.actions))
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every batch of episodes."""
+        iters = updates = 0
+        num_actions = len(self._env.actions)
+
+        for start in range(0, self._max_iters, self._batch_size):
+            # All episodes of the batch are generated with the same policy and then used for one update.
+            # With batch_size=1 this is the classic episode-by-episode Monte Carlo control.
+            num_episodes = min(self._batch_size, self._max_iters - start)
+            start_states, start_actions = self._start_sampler.sample_batch(num_episodes)
+            batch = utils.generate_episodes(
+                self._env, self._policy, num_episodes, self._max_steps, start_states, start_actions
+            )
+            iters += int(batch.lengths.sum())
+            self._last_return = float(batch.rewards.sum())
+
+            mask = batch.mask
+            self._state_counts += np.bincount(batch.states[mask], minlength=self._env.num_states)
+            self._start_sampler.update(batch.states[mask])
+
+            returns = utils.calc_batch_returns(batch, self._gamma)
+            keys = batch.states.astype(np.intp) * num_actions + batch.actions
+            first_visits = utils.calc_first_visit_mask(keys, mask, self._q.size)
+
+            # Returns of the same state-action pair from different episodes are averaged before the update.
+            sums = np.bincount(keys[first_visits], weights=returns[first_visits], minlength=self._q.size)
+            counts = np.bincount(keys[first_visits], minlength=self._q.size)
+            visited = np.flatnonzero(counts)
+
+            q = self._q.reshape(-1)
+            q[visited] += self._alpha * (sums[visited] / counts[visited] - q[visited])
+            updates += len(visited)
+
+            states = np.unique(visited // num_actions)
+            self._policy[states] = utils.calc_epsilon_greedy_probabilities(
+                np.argmax(self._q[states], axis=1), num_actions, self._epsilon
+            )
+
+            yield num_episodes, iters, updates
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns the values of states."""
+    def table(self) -> np.ndarray:
+        """Returns [S, A] quality of state-action pairs."""
 
-        return utils.calc_values_from_quality(self._q)
-
-    @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the best action for each state according to the current policy."""
-
-        return utils.calc_best_policy_from_quality(self._q)
+        return self._q
 
     @property
     def state_counts(self) -> dict[State, int]:
         """Returns the number of times each state was visited during training."""
-        return dict(self._state_counts)
+        return {self._env.index_state(i): int(count) for i, count in enumerate(self._state_counts) if count}
 
     @property
     def quality(self) -> dict[State, dict[Action, float]]:
         """Returns the quality of each state-action pair."""
-        return dict(self._q)
-
-    def _generate_episode(self) -> tuple[int, list[EpisodeItem]]:
-        """Generates an episode by following the current policy."""
-
-        episode: list[EpisodeItem] = []
-
-        state = self._get_start_state()
-
-        i = 0
-
-        for i in range(self._max_steps):
-            if self._env.is_terminal(state):
-                break
-
-            self._state_counts[state] += 1
-
-            action = utils.get_action(self._policy.get(state, utils.calc_action_probabilities(self._env.actions)))
-            next_state = self._env.next_state(state, action)
-            reward = self._env.reward(state, action, next_state)
-            episode.append(EpisodeItem(state, action, reward))
-            state = next_state
-
-        return i + 1, episode
-
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
-
-        # We start from a random non-terminal state to ensure that we explore the state space effectively.
-        # If it is allowed by the environment, we could also start from a fixed state or a distribution of states.
-
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
+        return utils.quality_to_dict(self._q, self._env)
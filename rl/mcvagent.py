@@ -1,14 +1,15 @@
 """Monte Carlo Agent for Reinforcement Learning"""
 
-import random
-from collections import defaultdict
+from typing import Iterator
 
+import numpy as np
 import utils
-from common import EpisodeItem
-from gridworld import Action, GridWorld, State
+from agent import TabularAgent
+from gridworld import GridWorld
+from sampling import StartStateSampler
 
 
-class MonteCarloValueAgent:
+class MonteCarloValueAgent(TabularAgent):
     """Monte Carlo value agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -18,90 +19,60 @@ class MonteCarloValueAgent:
         epsilon: float = 0.25,
         max_steps: int = 100,
         max_iters: int = 1000,
+        batch_size: int = 1,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._gamma = gamma
         self._epsilon = epsilon
         self._max_steps = max_steps
         self._max_iters = max_iters
-        self._values: dict[State, float] = defaultdict(float)
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._batch_size = batch_size
+        self._values = np.zeros(env.num_states)
 
-        # we can store only best action for each state and implement e-greedy policy in _generate_episode as:
+        # we can store only best action for each state and implement e-greedy policy in generate_episodes as:
         # random(epsilon) -> random action, else -> best action. But for generality, we will store the probabilities of
         # taking each action in each state, which allows us to implement more complex policies if needed.
-        self._policy: dict[State, dict[Action, float]] = {}
+        self._policy = np.full((env.num_states, len(env.actions)), 1.0 / len(env.actions))
 
-    def train(self) -> int:
-        """Trains agent."""
-        iters = 0
-        values_sum: dict[State, float] = {}
-        counts: dict[State, int] = {}
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every batch of episodes."""
+        iters = updates = 0
+        values_sum = np.zeros(self._env.num_states)
+        counts = np.zeros(self._env.num_states, dtype=np.int64)
 
-        for _ in range(self._max_iters):
-            steps, episode = self._generate_episode()
-            iters += steps
+        for start in range(0, self._max_iters, self._batch_size):
+            num_episodes = min(self._batch_size, self._max_iters - start)
+            start_states, _ = self._start_sampler.sample_batch(num_episodes)
+            batch = utils.generate_episodes(self._env, self._policy, num_episodes, self._max_steps, start_states)
+            iters += int(batch.lengths.sum())
+            self._last_return = float(batch.rewards.sum())
+            self._start_sampler.update(batch.states[batch.mask])
 
-            g = 0.0
+            returns = utils.calc_batch_returns(batch, self._gamma)
 
-            for t in reversed(range(len(episode))):
-                cur_item = episode[t]
-                g = self._gamma * g + cur_item.reward
+            # We implement the first-visit Monte Carlo method, so we only update the value
+            # if it is the first time we have visited it in this episode.
+            first_visits = utils.calc_first_visit_mask(batch.states, batch.mask, self._env.num_states)
+            states = batch.states[first_visits]
 
-                # We implement the first-visit Monte Carlo method, so we only update the value
-                # if it is the first time we have visited it in this episode.
-                if not any((item.state == cur_item.state) for item in episode[:t]):
-                    values_sum[cur_item.state] = values_sum.get(cur_item.state, 0.0) + g
-                    counts[cur_item.state] = counts.get(cur_item.state, 0) + 1
+            values_sum += np.bincount(states, weights=returns[first_visits], minlength=self._env.num_states)
+            counts += np.bincount(states, minlength=self._env.num_states)
 
-            for state, val_sum in values_sum.items():
-                self._values[state] = val_sum / counts[state]
+            visited = counts > 0
+            self._values[visited] = values_sum[visited] / counts[visited]
+            updates += len(states)
 
             # If model is available, we can derive the policy from the values. In this simple grid world,
             # we can just check all possible actions and choose the one that leads to the state with the highest value.
-            best_policy = utils.calc_best_policy_from_values(self._env, self._values, self._gamma)
+            best_actions = utils.calc_greedy_actions_from_values(self._env, self._values, self._gamma)
+            self._policy = utils.calc_epsilon_greedy_probabilities(best_actions, len(self._env.actions), self._epsilon)
 
-            for state, action in best_policy.items():
-                self._policy[state] = utils.calc_action_probabilities(self._env.actions, action, self._epsilon)
-
-        return iters
+            yield num_episodes, iters, updates
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns the values of states."""
+    def table(self) -> np.ndarray:
+        """Returns [S] state values."""
 
         return self._values
-
-    @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the best action for each state according to the current policy."""
-
-        return utils.calc_best_policy_from_quality(self._policy)
-
-    def _generate_episode(self) -> tuple[int, list[EpisodeItem]]:
-        """Generates an episode by following the current policy."""
-
-        episode: list[EpisodeItem] = []
-
-        state = self._get_start_state()
-
-        i = 0
-
-        for i in range(self._max_steps):
-            if self._env.is_terminal(state):
-                break
-
-            action = utils.get_action(self._policy.get(state, utils.calc_action_probabilities(self._env.actions)))
-            next_state = self._env.next_state(state, action)
-            reward = self._env.reward(state, action, next_state)
-            episode.append(EpisodeItem(state, action, reward))
-            state = next_state
-
-        return i + 1, episode
-
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
-
-        # We start from a random non-terminal state to ensure that we explore the state space effectively.
-        # If it is allowed by the environment, we could also start from a fixed state or a distribution of states.
-
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
@@ -0,0 +1,221 @@
+"""Offline RL data: columnar store of logged GridWorld transitions and importance sampling off-policy evaluation."""
+
+import os
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+from gridworld import GridWorld
+
+# Columns of the store and their compact dtypes. Episodes are stored contiguously in logging order, probability is the
+# behavior policy probability of the logged action (NaN if it was not logged).
+COLUMNS: dict[str, np.dtype] = {
+    "episode": np.dtype(np.int32),
+    "state": np.dtype(np.int32),
+    "action": np.dtype(np.int8),
+    "reward": np.dtype(np.float64),
+    "next_state": np.dtype(np.int32),
+    "done": np.dtype(np.bool_),
+    "probability": np.dtype(np.float64),
+}
+
+
+class TransitionStore:
+    """Columnar store of logged (state, action, reward, next state) transitions: one array per column.
+
+    Columns grow by doubling their capacity, so batched appends are amortized O(1) per transition. Saved stores are
+    directories of .npy files, loaded memory mapped: training reads them in chunks and never loads them whole.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._columns = {name: np.zeros(max(capacity, 1), dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Returns array view of the column."""
+        return self._columns[name][: self._length]
+
+    @property
+    def num_episodes(self) -> int:
+        """Returns number of logged episodes."""
+        episodes = self["episode"]
+
+        return int(np.count_nonzero(np.diff(episodes))) + 1 if len(episodes) else 0
+
+    def append(
+        self,
+        episodes: np.ndarray,
+        states: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        next_states: np.ndarray,
+        dones: np.ndarray,
+        probabilities: np.ndarray | None = None,
+    ) -> None:
+        """Appends a batch of transitions given as arrays of the columns."""
+        size = len(states)
+        values = {
+            "episode": episodes,
+            "state": states,
+            "action": actions,
+            "reward": rewards,
+            "next_state": next_states,
+            "done": dones,
+            "probability": np.full(size, np.nan) if probabilities is None else probabilities,
+        }
+
+        if self._length + size > len(self._columns["state"]):
+            capacity = max(2 * len(self._columns["state"]), self._length + size)
+
+            for name, column in self._columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[: self._length] = column[: self._length]
+                self._columns[name] = grown
+
+        for name, column in self._columns.items():
+            column[self._length : self._length + size] = values[name]
+
+        self._length += size
+
+    def chunks(self, size: int = 1 << 20) -> Iterator[dict[str, np.ndarray]]:
+        """Yields column views of consecutive chunks of at most size transitions."""
+        for start in range(0, self._length, size):
+            stop = min(start + size, self._length)
+
+            yield {name: np.asarray(column[start:stop]) for name, column in self._columns.items()}
+
+    def save(self, path: str) -> None:
+        """Saves columns as .npy files of the path directory."""
+        os.makedirs(path, exist_ok=True)
+
+        for name in COLUMNS:
+            np.save(os.path.join(path, name + ".npy"), self[name])
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "TransitionStore":
+        """Loads store saved by save, memory mapped read-only by default (appending copies it into memory)."""
+        store = cls(1)
+        store._columns = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None) for name in COLUMNS
+        }
+        store._length = len(store._columns["state"])
+
+        return store
+
+
+def collect(
+    env: GridWorld,
+    probabilities: np.ndarray,
+    num_episodes: int,
+    max_steps: int = 100,
+    store: TransitionStore | None = None,
+) -> TransitionStore:
+    """Logs episodes of a behavior policy given by [S, A] action probabilities, e.g. to simulate controller logs.
+
+    Episodes run in lockstep as in utils.generate_episodes and the behavior probability of every action is logged.
+    """
+    if store is None:
+        store = TransitionStore(num_episodes * 16)
+
+    first_episode = int(store["episode"][-1]) + 1 if len(store) else 0
+    cum_probabilities = np.cumsum(probabilities, axis=1)
+    max_action = probabilities.shape[1] - 1
+    running_states = np.flatnonzero(~env.terminal_mask)
+    states = running_states[np.random.randint(len(running_states), size=num_episodes)]
+    episodes = np.arange(first_episode, first_episode + num_episodes)
+    steps: list[tuple[np.ndarray, ...]] = []
+
+    for _ in range(max_steps):
+        if states.size == 0:
+            break
+
+        u = np.random.random(states.size)[:, None]
+        actions = np.minimum((u >= cum_probabilities[states]).sum(axis=1), max_action)
+        next_states, rewards = env.sample_transitions(states, actions)
+        dones = env.terminal_mask[next_states]
+        steps.append((episodes, states, actions, rewards, next_states, dones, probabilities[states, actions]))
+
+        states, episodes = next_states[~dones], episodes[~dones]
+
+    # Steps are stored time major, a stable sort by episode makes episodes contiguous
+    columns = [np.concatenate(column) for column in zip(*steps)] if steps else [np.zeros(0)] * len(COLUMNS)
+    order = np.argsort(columns[0], kind="stable")
+    store.append(*(column[order] for column in columns))
+
+    return store
+
+
+@dataclass(frozen=True)
+class OffPolicyEstimate:
+    """Importance sampling estimates of the expected discounted return of a target policy from logged episodes."""
+
+    ordinary: float  # mean of ρ · G over episodes, unbiased, high variance
+    weighted: float  # Σ ρ · G / Σ ρ, biased, low variance
+    per_decision: float  # Σₜ γᵗ · ρ₀:ₜ · rₜ, every reward weighted by the ratio of the actions before it
+    effective_sample_size: float  # (Σ ρ)² / Σ ρ² of episode ratios
+    episodes: int
+
+
+def estimate_behavior_probabilities(store: TransitionStore, num_states: int, num_actions: int) -> np.ndarray:
+    """Returns [N] behavior probabilities of the logged actions estimated by logged action frequencies."""
+    counts = np.zeros((num_states, num_actions))
+
+    for chunk in store.chunks():
+        np.add.at(counts, (chunk["state"], chunk["action"]), 1.0)
+
+    frequencies = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1.0)
+
+    return frequencies[store["state"], store["action"]]
+
+
+def evaluate_off_policy(store: TransitionStore, probabilities: np.ndarray, gamma: float = 0.99) -> OffPolicyEstimate:
+    """Estimates value of the target policy given by [S, A] action probabilities from logged episodes.
+
+    Ratios are cumulated in log space per episode with one segmented cumulative sum over all transitions, actions the
+    target policy never takes are counted separately and zero the ratios. Missing behavior probabilities are estimated
+    from logged action frequencies.
+    """
+    episodes, states, actions, rewards = store["episode"], store["state"], store["action"], store["reward"]
+
+    if len(store) == 0:
+        return OffPolicyEstimate(0.0, 0.0, 0.0, 0.0, 0)
+
+    behavior = np.asarray(store["probability"])
+
+    if np.isnan(behavior).any():
+        estimated = estimate_behavior_probabilities(store, probabilities.shape[0], probabilities.shape[1])
+        behavior = np.where(np.isnan(behavior), estimated, behavior)
+
+    target = probabilities[states, actions]
+    log_ratios = np.log(np.maximum(target, 1e-300)) - np.log(behavior)
+    zeros = (target == 0.0).astype(np.int64)
+
+    # Episode starts and time steps: segmented cumulative sums subtract the total before the episode start
+    starts = np.flatnonzero(np.concatenate(([True], episodes[1:] != episodes[:-1])))
+    lengths = np.diff(np.append(starts, len(store)))
+    t = np.arange(len(store)) - np.repeat(starts, lengths)
+
+    def segmented_cumsum(values: np.ndarray) -> np.ndarray:
+        cum = np.cumsum(values)
+        offsets = np.concatenate(([0], cum[starts[1:] - 1]))
+
+        return cum - np.repeat(offsets, lengths)
+
+    ratios = np.exp(segmented_cumsum(log_ratios)) * (segmented_cumsum(zeros) == 0)
+    discounted = gamma**t * rewards
+
+    episode_ratios = ratios[starts + lengths - 1]
+    episode_returns = np.add.reduceat(discounted, starts)
+    per_decision = np.add.reduceat(ratios * discounted, starts)
+    total_ratio = float(episode_ratios.sum())
+
+    return OffPolicyEstimate(
+        float(np.mean(episode_ratios * episode_returns)),
+        float(episode_ratios @ episode_returns / total_ratio) if total_ratio > 0.0 else 0.0,
+        float(np.mean(per_decision)),
+        total_ratio**2 / float(episode_ratios @ episode_ratios) if total_ratio > 0.0 else 0.0,
+        len(starts),
+    )
@@ -1,15 +1,15 @@
 """Policy Gradient (REINFORCE) Agent"""
 
-import random
-from collections import defaultdict
+from typing import Iterator
 
 import numpy as np
 import utils
-from common import EpisodeItem
+from agent import TabularAgent
 from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
 
 
-class PolicyGradientAgent:
+class PolicyGradientAgent(TabularAgent):
     """REINFORCE (Monte Carlo Policy Gradient) agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -19,97 +19,108 @@ class PolicyGradientAgent:
         gamma: float = 0.99,
         max_steps: int = 100,
         max_iters: int = 1000,
+        batch_size: int = 1,
+        baseline: bool = False,
+        normalize_returns: bool = False,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._alpha = alpha
         self._gamma = gamma
         self._max_steps = max_steps
         self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._batch_size = batch_size
+        self._baseline = baseline
+        self._normalize_returns = normalize_returns
 
-        self._values: dict[State, float] = {}  # state value estimates for reporting
+        self._values = np.zeros(env.num_states)  # state value estimates for reporting
         # Action preferences h(s,a) — softmax over these gives π(a|s)
-        self._preferences: dict[State, dict[Action, float]] = defaultdict(lambda: defaultdict(float))
+        self._preferences = np.zeros((env.num_states, len(env.actions)))
+        # Softmax cache π(·|s), rows are refreshed when preferences of the state change
+        self._probabilities = utils.softmax(self._preferences)
 
-    def train(self) -> int:
-        """Trains agent using REINFORCE algorithm."""
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent using REINFORCE, yields number of finished episodes, iterations and updates per batch."""
 
-        iters = 0
+        iters = updates = 0
 
-        for _ in range(self._max_iters):
-            steps, episode = self._generate_episode()
-            iters += steps
+        for start in range(0, self._max_iters, self._batch_size):
+            num_episodes = min(self._batch_size, self._max_iters - start)
 
-            # Compute returns for each step
-            returns = utils.calc_returns(episode, self._gamma)
-
-            for t, item in enumerate(episode):
-                policy = self._softmax_policy(item.state)
-                g = returns[t]
+            # All episodes of the batch are generated with the same policy and used for one averaged gradient step.
+            start_states, _ = self._start_sampler.sample_batch(num_episodes)
+            batch = utils.generate_episodes(self._env, self._probabilities, num_episodes, self._max_steps, start_states)
+            iters += int(batch.lengths.sum())
+            self._last_return = float(batch.rewards.sum())
 
-                # Update state value estimate (for reporting)
-                self._values[item.state] = self._values.get(item.state, 0.0) + self._alpha * (
-                    g - self._values.get(item.state, 0.0)
-                )
+            mask = batch.mask
+            self._start_sampler.update(batch.states[mask])
 
-                # Policy gradient update: θ ← θ + α · γᵗ · Gₜ · ∇ln π(Aₜ|Sₜ, θ)
-                # Full softmax gradient: ∂ln π(Aₜ|s)/∂h(s,a) = 1{a=Aₜ} - π(a|s)
-                for a in self._env.actions:
-                    grad = (1.0 if a == item.action else 0.0) - policy[a]
-                    self._preferences[item.state][a] += self._alpha * (self._gamma**t) * g * grad
+            if not mask.any():
+                yield num_episodes, iters, updates
+                continue
 
-        return iters
+            # Compute returns for each step
+            returns = utils.calc_batch_returns(batch, self._gamma)
+            advantages = returns
+
+            if self._baseline:
+                # Per-timestep leave-one-out baseline: mean return at step t over the other episodes still running
+                # at t, so it is independent of the return it corrects. Steps with no other episode get no baseline.
+                running = mask.sum(axis=0)
+                others = (returns * mask).sum(axis=0) - returns
+                advantages = returns - np.where(running > 1, others / np.maximum(running - 1, 1), 0.0)
+
+            if self._normalize_returns:
+                valid = advantages[mask]
+                advantages = (advantages - valid.mean()) / (valid.std() + 1e-8)
+
+            states = batch.states[mask]
+            actions = batch.actions[mask]
+            t = np.nonzero(mask)[1]
+
+            # Update state value estimates (for reporting), returns of the same state are averaged
+            counts = np.bincount(states, minlength=self._env.num_states)
+            sums = np.bincount(states, weights=returns[mask], minlength=self._env.num_states)
+            visited = np.flatnonzero(counts)
+            self._values[visited] += self._alpha * (sums[visited] / counts[visited] - self._values[visited])
+
+            # Policy gradient update: θ ← θ + α · γᵗ · Gₜ · ∇ln π(Aₜ|Sₜ, θ)
+            # Full softmax gradient: ∂ln π(Aₜ|s)/∂h(s,a) = 1{a=Aₜ} - π(a|s)
+            # All steps of the batch are applied at once with the policy the episodes were generated with, the
+            # gradient is averaged over the episodes.
+            grad = -self._probabilities[states]
+            grad[np.arange(len(states)), actions] += 1.0
+            weights = self._alpha * self._gamma**t * advantages[mask] / num_episodes
+            np.add.at(self._preferences, states, weights[:, None] * grad)
+
+            self._update_probabilities(states)
+            updates += len(states)
+
+            yield num_episodes, iters, updates
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns state value estimates."""
-        return self._values
+    def table(self) -> np.ndarray:
+        """Returns [S, A] action preferences."""
+        return self._preferences
 
     @property
-    def policy(self) -> dict[State, dict[Action, float]]:
-        """Returns the current policy π(a|s) for each state."""
-        return utils.calc_best_policy_from_quality(self._preferences)
+    def value_table(self) -> np.ndarray:
+        """Returns [S] state value estimates."""
+        return self._values
 
     @property
     def quality(self) -> dict[State, dict[Action, float]]:
         """Returns action preferences h(s,a) for each state-action pair."""
-        return self._preferences
-
-    def _softmax_policy(self, state: State) -> dict[Action, float]:
-        """Computes π(·|s) via softmax over action preferences h(s, ·)."""
-
-        prefs = self._preferences[state]
-        actions = self._env.actions
-        h = np.array([prefs[a] for a in actions])
-
-        # Numerically stable softmax
-        h = h - np.max(h)
-        exp_h = np.exp(h)
-        probs = exp_h / np.sum(exp_h)
-
-        return {a: float(p) for a, p in zip(actions, probs)}
-
-    def _generate_episode(self) -> tuple[int, list[EpisodeItem]]:
-        """Generates an episode by following the current policy."""
-
-        episode: list[EpisodeItem] = []
-        state = self._get_start_state()
-        i = 0
-
-        for i in range(self._max_steps):
-            if self._env.is_terminal(state):
-                break
-
-            policy = self._softmax_policy(state)
-            action = utils.get_action(policy)
-
-            next_state = self._env.next_state(state, action)
-            reward = self._env.reward(state, action, next_state)
-            episode.append(EpisodeItem(state, action, reward))
-            state = next_state
+        return utils.quality_to_dict(self._preferences, self._env)
 
-        return i + 1, episode
+    def _calc_action_probabilities(self) -> np.ndarray:
+        """Returns [S, A] softmax policy π(a|s)."""
+        return self._probabilities.copy()
 
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
+    def _update_probabilities(self, states: np.ndarray) -> None:
+        """Recomputes cached π(·|s) via softmax over action preferences h(s, ·) for the given states."""
 
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
+        states = np.unique(states)
+        self._probabilities[states] = utils.softmax(self._preferences[states])
@@ -1,15 +1,16 @@
 """Policy Gradient (REINFORCE with Baseline) Agent"""
 
-import random
-from collections import defaultdict
+from typing import Iterator
 
 import numpy as np
 import utils
-from common import EpisodeItem
+from agent import TabularAgent
+from common import Episode
 from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
 
 
-class PolicyGradientBaselineAgent:
+class PolicyGradientBaselineAgent(TabularAgent):
     """REINFORCE with Baseline agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -20,6 +21,7 @@ class PolicyGradientBaselineAgent:
         gamma: float = 0.99,
         max_steps: int = 100,
         max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._alpha_critic = alpha_critic
@@ -27,93 +29,93 @@ class PolicyGradientBaselineAgent:
         self._gamma = gamma
         self._max_steps = max_steps
         self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
 
         # Baseline: state-value function v̂(s, w)
-        self._values: dict[State, float] = {}
+        self._values = np.zeros(env.num_states)
         # Actor: action preferences h(s,a) — softmax over these gives π(a|s)
-        self._preferences: dict[State, dict[Action, float]] = defaultdict(lambda: defaultdict(float))
+        self._preferences = np.zeros((env.num_states, len(env.actions)))
+        # Softmax cache π(·|s), rows are refreshed when preferences of the state change
+        self._probabilities = utils.softmax(self._preferences)
 
-    def train(self) -> int:
-        """Trains agent using REINFORCE with Baseline algorithm."""
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent using REINFORCE with Baseline algorithm, yields episodes, iterations and updates per episode."""
 
-        iters = 0
+        iters = updates = 0
 
         for _ in range(self._max_iters):
             steps, episode = self._generate_episode()
             iters += steps
+            self._last_return = float(episode.rewards.sum())
+            self._start_sampler.update(episode.states)
+
+            if len(episode) == 0:
+                yield 1, iters, updates
+                continue
+
+            states = episode.states
+            t = np.arange(len(episode))
 
             returns = utils.calc_returns(episode, self._gamma)
 
-            for t, item in enumerate(episode):
-                policy = self._softmax_policy(item.state)
-                g = returns[t]
+            # δ ← G - v̂(Sₜ, w)
+            delta = returns - self._values[states]
 
-                # δ ← G - v̂(Sₜ, w)
-                delta = g - self._values.get(item.state, 0.0)
+            # Critic update: w ← w + αʷ · δ · ∇v̂(Sₜ, w)
+            # Tabular: ∇v̂(Sₜ, w) = 1 for w[Sₜ], 0 elsewhere
+            np.add.at(self._values, states, self._alpha_critic * delta)
 
-                # Critic update: w ← w + αʷ · δ · ∇v̂(Sₜ, w)
-                # Tabular: ∇v̂(Sₜ, w) = 1 for w[Sₜ], 0 elsewhere
-                self._values[item.state] = self._values.get(item.state, 0.0) + self._alpha_critic * delta
+            # Actor update: θ ← θ + αᶿ · γ^t · δ · ∇ln π(Aₜ|Sₜ, θ)
+            # Full softmax gradient: ∂ln π(Aₜ|s)/∂h(s,a) = 1{a=Aₜ} - π(a|s)
+            grad = -self._probabilities[states]
+            grad[t, episode.actions] += 1.0
+            np.add.at(self._preferences, states, (self._alpha_actor * self._gamma**t * delta)[:, None] * grad)
 
-                # Actor update: θ ← θ + αᶿ · γ^t · δ · ∇ln π(Aₜ|Sₜ, θ)
-                # Full softmax gradient: ∂ln π(Aₜ|s)/∂h(s,a) = 1{a=Aₜ} - π(a|s)
-                for a in self._env.actions:
-                    grad = (1.0 if a == item.action else 0.0) - policy[a]
-                    self._preferences[item.state][a] += self._alpha_actor * (self._gamma**t) * delta * grad
+            self._update_probabilities(states)
+            updates += len(episode)
 
-        return iters
+            yield 1, iters, updates
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns state value estimates."""
-        return self._values
+    def table(self) -> np.ndarray:
+        """Returns [S, A] action preferences."""
+        return self._preferences
 
     @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the greedy policy derived from action preferences."""
-        return utils.calc_best_policy_from_quality(self._preferences)
+    def value_table(self) -> np.ndarray:
+        """Returns [S] state value estimates."""
+        return self._values
 
     @property
     def quality(self) -> dict[State, dict[Action, float]]:
         """Returns action preferences h(s,a) for each state-action pair."""
-        return self._preferences
-
-    def _softmax_policy(self, state: State) -> dict[Action, float]:
-        """Computes π(·|s) via softmax over action preferences h(s, ·)."""
+        return utils.quality_to_dict(self._preferences, self._env)
 
-        prefs = self._preferences[state]
-        actions = self._env.actions
-        h = np.array([prefs[a] for a in actions])
+    def _calc_action_probabilities(self) -> np.ndarray:
+        """Returns [S, A] softmax policy π(a|s)."""
+        return self._probabilities.copy()
 
-        # Numerically stable softmax
-        h = h - np.max(h)
-        exp_h = np.exp(h)
-        probs = exp_h / np.sum(exp_h)
+    def _update_probabilities(self, states: np.ndarray) -> None:
+        """Recomputes cached π(·|s) via softmax over action preferences h(s, ·) for the given states."""
 
-        return {a: float(p) for a, p in zip(actions, probs)}
+        states = np.unique(states)
+        self._probabilities[states] = utils.softmax(self._preferences[states])
 
-    def _generate_episode(self) -> tuple[int, list[EpisodeItem]]:
+    def _generate_episode(self) -> tuple[int, Episode]:
         """Generates an episode by following the current policy."""
 
-        episode: list[EpisodeItem] = []
-        state = self._get_start_state()
-        i = 0
-
-        for i in range(self._max_steps):
+        episode = Episode(self._env)
+        state, _ = self._start_sampler.sample()
+        state = self._env.index_state(state)
+        for _ in range(self._max_steps):
             if self._env.is_terminal(state):
                 break
 
-            policy = self._softmax_policy(state)
-            action = utils.get_action(policy)
-
-            next_state = self._env.next_state(state, action)
-            reward = self._env.reward(state, action, next_state)
-            episode.append(EpisodeItem(state, action, reward))
-            state = next_state
-
-        return i + 1, episode
+            index = self._env.state_index(state)
+            action = utils.sample_action(self._probabilities[index])
 
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
+            next_index, reward = self._env.step(index, action)
+            episode.append(state, action, reward)
+            state = self._env.index_state(next_index)
 
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
+        return len(episode), episode
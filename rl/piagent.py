@@ -1,13 +1,17 @@
 """Policy Iteration Agent for GridWorld environment."""
 
-from collections import defaultdict
+from typing import Iterator
 
-from gridworld import Action, GridWorld, State
+import numpy as np
+from agent import TabularAgent
+from gridworld import GridWorld
 
 
-class PolicyIterationAgent:
+class PolicyIterationAgent(TabularAgent):
     """Policy iteration agent to find the optimal policy for a given GridWorld environment."""
 
+    is_planner = True
+
     def __init__(
         self,
         env: GridWorld,
@@ -19,36 +23,36 @@ class PolicyIterationAgent:
         self._gamma = gamma
         self._theta = theta
         self._max_iters = max_iters
-        self._policy: dict[State, Action] = defaultdict(lambda: self._env.actions[0])
-        self._values: dict[State, float] = defaultdict(float)
+        self._policy = np.zeros(env.num_states, dtype=np.int64)
+        self._values = np.zeros(env.num_states)
 
-    def train(self) -> int:
-        """Trains agent."""
-        total_iters = 0
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields after every policy improvement with total number of evaluation sweeps and backups."""
+        total_iters = updates = 0
+        num_states = int(np.count_nonzero(~self._env.terminal_mask))
 
-        for state in self._env.states:
-            if not self._env.is_terminal(state):
-                self._policy[state] = self._env.actions[0]
+        self._policy[:] = self._env.actions[0]
 
         while True:
             num_iters = self._evaluate_policy()
 
             total_iters += num_iters
+            updates += num_iters * num_states
+            policy_stable = self._improve_policy()
 
-            if self._improve_policy():
-                break
+            yield 1, total_iters, updates
 
-        return total_iters
+            if policy_stable:
+                break
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns state values."""
-        return dict(self._values)
+    def table(self) -> np.ndarray:
+        """Returns [S] state values."""
+        return self._values
 
-    @property
-    def policy(self) -> dict[State, Action]:
-        """Returns policy."""
-        return dict(self._policy)
+    def _calc_greedy_actions(self) -> np.ndarray:
+        """Returns [S] action index of each state of the current policy."""
+        return self._policy.copy()
 
     def _evaluate_policy(self) -> int:
         i = 0
@@ -60,7 +64,8 @@ class PolicyIterationAgent:
                 if self._env.is_terminal(state):
                     continue
 
-                action = self._policy[state]
+                index = self._env.state_index(state)
+                action = self._env.actions[self._policy[index]]
 
                 # For simple deterministic environment we can use direct next state and reward
                 # calculation here:
@@ -75,11 +80,12 @@ class PolicyIterationAgent:
 
                 for transition in self._env.get_transition(state, action):
                     value += transition.probability * (
-                        transition.reward + self._gamma * self._values[transition.next_state]
+                        transition.reward
+                        + self._gamma * self._values[self._env.state_index(transition.next_state)]
                     )
 
-                delta = max(delta, abs(self._values[state] - value))
-                self._values[state] = value
+                delta = max(delta, abs(self._values[index] - value))
+                self._values[index] = value
             if delta < self._theta:
                 break
 
@@ -92,7 +98,8 @@ class PolicyIterationAgent:
             if self._env.is_terminal(state):
                 continue
 
-            old_action = self._policy[state]
+            index = self._env.state_index(state)
+            old_action = self._env.actions[self._policy[index]]
             best_action = old_action
             best_value = float("-inf")
 
@@ -110,14 +117,14 @@ class PolicyIterationAgent:
 
                 for transition in self._env.get_transition(state, action):
                     value += transition.probability * (
-                        transition.reward + self._gamma * self._values[transition.next_state]
+                        transition.reward + self._gamma * self._values[self._env.state_index(transition.next_state)]
                     )
 
                 if value > best_value:
                     best_value = value
                     best_action = action
 
-            self._policy[state] = best_action
+            self._policy[index] = best_action
 
             if best_action != old_action:
                 policy_stable = False
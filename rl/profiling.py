@@ -0,0 +1,226 @@
+"""Opt-in profiling of tabular agent training phases with sampled timers."""
+
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+import utils
+
+if TYPE_CHECKING:
+    from agent import TabularAgent
+
+# Training phases: owner of the wrapped callables and their attribute names. Owners are the utils module, the agent
+# environment, the agent itself and its start state sampler. Callables missing on an owner are skipped.
+PHASES: dict[str, tuple[str, tuple[str, ...]]] = {
+    "action selection": ("utils", ("sample_action", "sample_epsilon_greedy_action")),
+    "environment": ("env", ("step", "sample_transitions", "get_transition", "calc_action_values")),
+    "planning": ("agent", ("_plan", "_sweep", "_replay_step")),
+    "policy rebuild": ("agent", ("_update_probabilities", "_calc_greedy_actions", "_calc_action_probabilities")),
+    "start states": ("sampler", ("sample", "sample_batch", "update")),
+}
+
+# Time of the training loop outside of the wrapped phases: table updates, traces and episode bookkeeping
+OTHER = "table updates and loop"
+
+# Marks attributes missing on the owner before attach
+_MISSING = object()
+
+
+@dataclass
+class PhaseStats:
+    """Accumulated counters of a phase: all calls are counted, every sample_every-th call is timed."""
+
+    calls: int = 0
+    samples: int = 0
+    sampled_ns: int = 0
+    sampled_bytes: int = 0
+
+    def estimate(self, value: int) -> float:
+        """Returns value accumulated over sampled calls scaled to all calls."""
+        return value * self.calls / self.samples if self.samples else 0.0
+
+
+@dataclass(frozen=True)
+class PhaseReport:
+    """Profile of a training phase."""
+
+    name: str
+    calls: int
+    time: float  # estimated seconds
+    share: float  # fraction of the training time
+    allocated: float | None  # estimated net allocated bytes, None if memory is not traced
+
+
+@dataclass(frozen=True)
+class ProfileReport:
+    """Profile of agent training."""
+
+    total: float  # seconds spent in training episodes
+    episodes: int
+    phases: tuple[PhaseReport, ...]
+    peak_memory: int | None  # peak traced memory, bytes
+
+
+class Profiler:
+    """Accumulates call counts, time and optionally allocations of agent training phases.
+
+    While the agent trains, callables of PHASES are replaced by wrappers counting every call and timing every
+    sample_every-th one with perf_counter_ns, the estimated phase time is scaled by calls / samples. Wrappers are
+    installed only while a training step runs and the agent is untouched when profiling is disabled, so it costs
+    nothing then.
+    With trace_memory, tracemalloc measures net allocations of the sampled calls, which slows training noticeably.
+    """
+
+    def __init__(self, sample_every: int = 16, trace_memory: bool = False) -> None:
+        self._sample_every = sample_every
+        self._trace_memory = trace_memory
+        self._stats = {name: PhaseStats() for name in PHASES}
+        self._total_ns = 0
+        self._episodes = 0
+        self._peak_memory = 0
+        self._restore: list[tuple[Any, str, Any]] = []
+
+    def profile_episodes(
+        self, agent: "TabularAgent", episodes: Iterator[tuple[int, int, int]]
+    ) -> Iterator[tuple[int, int, int]]:
+        """Wraps agent episode generator: phases are instrumented and time is counted only inside its steps.
+
+        Wrappers are installed around every step only, so calls of other code running while training is suspended
+        (e.g. another agent sharing the environment or utils) are never counted.
+        """
+        while True:
+            started_tracing = self._trace_memory and not tracemalloc.is_tracing()
+
+            if started_tracing:
+                tracemalloc.start()
+
+            self._attach(agent)
+
+            try:
+                start = time.perf_counter_ns()
+                item = next(episodes, None)
+                self._total_ns += time.perf_counter_ns() - start
+            finally:
+                self._detach()
+
+                if self._trace_memory and tracemalloc.is_tracing():
+                    self._peak_memory = max(self._peak_memory, tracemalloc.get_traced_memory()[1])
+
+                if started_tracing:
+                    tracemalloc.stop()
+
+            if item is None:
+                break
+
+            self._episodes += item[0]
+
+            yield item
+
+    def report(self) -> ProfileReport:
+        """Returns profile of all training so far, phases sorted by time."""
+        total = self._total_ns / 1e9
+        phases = []
+
+        for name, stats in self._stats.items():
+            if stats.calls == 0:
+                continue
+
+            phase_time = stats.estimate(stats.sampled_ns) / 1e9
+            allocated = stats.estimate(stats.sampled_bytes) if self._trace_memory else None
+            phases.append(PhaseReport(name, stats.calls, phase_time, phase_time / total if total else 0.0, allocated))
+
+        # Phases may call each other (e.g. planning steps the environment model), the remainder is a lower bound then
+        other = max(total - sum(phase.time for phase in phases), 0.0)
+        phases.append(PhaseReport(OTHER, self._episodes, other, other / total if total else 0.0, None))
+
+        return ProfileReport(
+            total,
+            self._episodes,
+            tuple(sorted(phases, key=lambda phase: -phase.time)),
+            self._peak_memory if self._trace_memory else None,
+        )
+
+    def _attach(self, agent: "TabularAgent") -> None:
+        """Replaces phase callables of the agent, its environment, start sampler and utils by wrappers."""
+        owners = {"utils": utils, "env": agent.env, "agent": agent, "sampler": getattr(agent, "_start_sampler", None)}
+
+        for name, (owner_name, attributes) in PHASES.items():
+            owner = owners[owner_name]
+
+            for attribute in attributes:
+                function = getattr(owner, attribute, None)
+
+                if function is None or not callable(function):
+                    continue
+
+                # Attributes set on the owner itself (module functions, other instance patches) are restored on detach,
+                # wrappers shadowing class methods are deleted
+                self._restore.append((owner, attribute, vars(owner).get(attribute, _MISSING)))
+                setattr(owner, attribute, self._wrap(self._stats[name], function))
+
+    def _detach(self) -> None:
+        """Restores the wrapped callables."""
+        for owner, attribute, function in reversed(self._restore):
+            if function is _MISSING:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, function)
+
+        self._restore.clear()
+
+    def _wrap(self, stats: PhaseStats, function: Callable) -> Callable:
+        """Returns wrapper of the function counting calls and timing every sample_every-th call."""
+        sample_every = self._sample_every
+        counter = time.perf_counter_ns
+
+        if self._trace_memory:
+            traced_memory = tracemalloc.get_traced_memory
+
+            def traced_wrapper(*args: Any, **kwargs: Any) -> Any:
+                stats.calls += 1
+
+                if stats.calls % sample_every:
+                    return function(*args, **kwargs)
+
+                memory = traced_memory()[0]
+                start = counter()
+                result = function(*args, **kwargs)
+                stats.sampled_ns += counter() - start
+                stats.sampled_bytes += traced_memory()[0] - memory
+                stats.samples += 1
+
+                return result
+
+            return traced_wrapper
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            stats.calls += 1
+
+            if stats.calls % sample_every:
+                return function(*args, **kwargs)
+
+            start = counter()
+            result = function(*args, **kwargs)
+            stats.sampled_ns += counter() - start
+            stats.samples += 1
+
+            return result
+
+        return wrapper
+
+
+def format_profile(report: ProfileReport) -> str:
+    """Returns aligned text table of the profile."""
+    lines = [f"{'phase':24} {'calls':>10} {'time, s':>10} {'share':>7} {'allocated':>12}"]
+
+    for phase in report.phases:
+        allocated = f"{phase.allocated / 1024:.1f} KiB" if phase.allocated is not None else ""
+        lines.append(f"{phase.name:24} {phase.calls:10d} {phase.time:10.4f} {phase.share:7.1%} {allocated:>12}")
+
+    lines.append(f"{'total':24} {report.episodes:10d} {report.total:10.4f}")
+
+    if report.peak_memory is not None:
+        lines.append(f"peak traced memory: {report.peak_memory / 1024:.1f} KiB")
+
+    return "\n".join(lines)
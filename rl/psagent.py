@@ -0,0 +1,213 @@
+"""Prioritized Sweeping Agent"""
+
+import heapq
+from typing import Iterator
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
+
+
+class PrioritizedSweepingAgent(TabularAgent):
+    """Prioritized sweeping agent to find the optimal policy for a given GridWorld environment.
+
+    The model and predecessors of each state are learned from experience. Every real transition gets a one-step
+    Q-learning update, then planning Q-learning updates are applied to the state-action pairs in order of their
+    remaining Bellman residual, changes are propagated backwards through predecessors.
+    """
+
+    def __init__(
+        self,
+        env: GridWorld,
+        alpha: float = 0.1,
+        gamma: float = 0.99,
+        epsilon: float = 0.25,
+        planning_steps: int = 10,
+        theta: float = 1e-4,
+        max_steps: int = 100,
+        max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
+    ) -> None:
+        self._env = env
+        self._alpha = alpha
+        self._gamma = gamma
+        self._epsilon = epsilon
+        self._planning_steps = planning_steps
+        self._theta = theta
+        self._max_steps = max_steps
+        self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._q = np.zeros((env.num_states, len(env.actions)))
+
+        # Learned deterministic model: last observed next state and reward for each state-action pair
+        self._model_next_states = np.full(self._q.size, -1, dtype=np.int64)
+        self._model_rewards = np.zeros(self._q.size)
+
+        # Predecessors as intrusive linked lists: head of the list of state-action pairs leading to each state and the
+        # next pair in the same list. Two integer arrays instead of dict of sets.
+        self._predecessor_heads = np.full(env.num_states, -1, dtype=np.int64)
+        self._predecessor_links = np.full(self._q.size, -1, dtype=np.int64)
+
+        # Max-priority queue with lazy deletion: heap entries are valid only if they match the current priority.
+        self._queue: list[tuple[float, int]] = []
+        self._priorities = np.zeros(self._q.size)
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        num_actions = len(self._env.actions)
+        env_step, terminals = self._env.step, self._env.terminal_mask
+
+        for _ in range(self._max_iters):
+            state, action = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
+
+            for _ in range(self._max_steps):
+                if terminals[state]:
+                    break
+
+                if action < 0:
+                    action = utils.sample_epsilon_greedy_action(self._q[state], self._epsilon)
+
+                next_state, reward = env_step(state, action)
+                episode_return += reward
+                index = state * num_actions + action
+
+                # One-step Q-learning update of the real transition, the remaining residual is queued for planning
+                self._update_model(index, next_state, reward)
+                self._q[state, action] += self._alpha * (
+                    reward + self._gamma * np.max(self._q[next_state]) - self._q[state, action]
+                )
+                self._push(index, abs(self._calc_td_error(index)))
+                self._push_predecessors(state)
+                updates += 1 + self._sweep()
+
+                visited.append(state)
+                state = next_state
+                action = -1
+
+            self._start_sampler.update(visited)
+
+            iters += len(visited)
+            self._last_return = episode_return
+
+            yield 1, iters, updates
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns [S, A] quality of state-action pairs."""
+
+        return self._q
+
+    @property
+    def quality(self) -> dict[State, dict[Action, float]]:
+        """Returns the quality of state-action pairs."""
+
+        return utils.quality_to_dict(self._q, self._env)
+
+    def _calc_td_error(self, index: int) -> float:
+        """Returns Q-learning TD error R + γ max Q(S', a) - Q(S, A) of the state-action pair according to the model."""
+
+        q = self._q.reshape(-1)
+
+        return (
+            self._model_rewards[index] + self._gamma * np.max(self._q[self._model_next_states[index]]) - q[index]
+        )
+
+    def _sweep(self) -> int:
+        """Applies up to planning_steps updates to the pairs with highest priority, returns number of updates."""
+
+        q = self._q.reshape(-1)
+        num_actions = len(self._env.actions)
+        updates = 0
+
+        for _ in range(self._planning_steps):
+            index = self._pop()
+
+            if index < 0:
+                break
+
+            q[index] += self._alpha * self._calc_td_error(index)
+            updates += 1
+
+            self._push_predecessors(index // num_actions)
+
+        return updates
+
+    def _push_predecessors(self, state: int) -> None:
+        """Re-prioritizes state-action pairs leading to the state after its Q values changed."""
+
+        predecessors = self._get_predecessors(state)
+
+        if len(predecessors) == 0:
+            return
+
+        q = self._q.reshape(-1)
+        priorities = np.abs(self._model_rewards[predecessors] + self._gamma * np.max(self._q[state]) - q[predecessors])
+
+        for predecessor, priority in zip(predecessors, priorities):
+            self._push(predecessor, priority)
+
+    def _update_model(self, index: int, next_state: int, reward: float) -> None:
+        """Records observed transition of the state-action pair in the model and predecessor lists."""
+
+        old_next_state = self._model_next_states[index]
+
+        if old_next_state != next_state:
+            if old_next_state >= 0:
+                self._unlink_predecessor(index, old_next_state)
+
+            self._predecessor_links[index] = self._predecessor_heads[next_state]
+            self._predecessor_heads[next_state] = index
+
+        self._model_next_states[index] = next_state
+        self._model_rewards[index] = reward
+
+    def _unlink_predecessor(self, index: int, state: int) -> None:
+        """Removes state-action pair from the predecessor list of the state."""
+
+        if self._predecessor_heads[state] == index:
+            self._predecessor_heads[state] = self._predecessor_links[index]
+            return
+
+        cur = self._predecessor_heads[state]
+
+        while self._predecessor_links[cur] != index:
+            cur = self._predecessor_links[cur]
+
+        self._predecessor_links[cur] = self._predecessor_links[index]
+
+    def _get_predecessors(self, state: int) -> np.ndarray:
+        """Returns flat indices of state-action pairs observed to lead to the state."""
+
+        predecessors = []
+        cur = self._predecessor_heads[state]
+
+        while cur >= 0:
+            predecessors.append(cur)
+            cur = self._predecessor_links[cur]
+
+        return np.array(predecessors, dtype=np.int64)
+
+    def _push(self, index: int, priority: float) -> None:
+        """Queues the state-action pair if the priority exceeds theta and its current priority."""
+
+        if priority > self._theta and priority > self._priorities[index]:
+            self._priorities[index] = priority
+            heapq.heappush(self._queue, (-priority, index))
+
+    def _pop(self) -> int:
+        """Returns the state-action pair with the highest priority or -1 if the queue is empty."""
+
+        while self._queue:
+            priority, index = heapq.heappop(self._queue)
+
+            if -priority == self._priorities[index]:
+                self._priorities[index] = 0.0
+                return index
+
+        return -1
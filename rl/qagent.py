@@ -1,13 +1,16 @@
 """Q-learning Agent"""
 
-import random
-from collections import defaultdict
+from typing import Iterator
 
+import numpy as np
 import utils
+from agent import TabularAgent
+from common import ReplayBuffer, ReplayConfig
 from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
 
 
-class QLearningAgent:
+class QLearningAgent(TabularAgent):
     """Q-learning agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -18,6 +21,8 @@ class QLearningAgent:
         epsilon: float = 0.25,
         max_steps: int = 100,
         max_iters: int = 1000,
+        replay: ReplayConfig | None = None,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._alpha = alpha
@@ -25,66 +30,98 @@ class QLearningAgent:
         self._epsilon = epsilon
         self._max_steps = max_steps
         self._max_iters = max_iters
-        self._q: dict[State, dict[Action, float]] = defaultdict(lambda: defaultdict(float))
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._q = np.zeros((env.num_states, len(env.actions)))
+        self._updated = np.zeros(env.num_states, dtype=bool)  # states with Q changed since the last policy update
 
         # we can store only best action for each state and implement e-greedy policy in _generate_episode as:
         # random(epsilon) -> random action, else -> best action. But for generality, we will store the probabilities of
         # taking each action in each state, which allows us to implement more complex policies if needed.
-        self._policy: dict[State, dict[Action, float]] = {}
+        self._policy = np.full((env.num_states, len(env.actions)), 1.0 / len(env.actions))
 
-    def train(self) -> int:
-        """Trains agent."""
+        # Experience replay: replay.ratio replayed transitions per environment step, applied in minibatches
+        replay = replay or ReplayConfig(ratio=0.0)
+        self._replay_ratio = replay.ratio
+        self._replay_batch_size = replay.batch_size
+        self._replay = ReplayBuffer(replay.capacity) if replay.ratio > 0.0 else None
+        self._replay_credit = 0.0
 
-        iters = 0
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        env_step, terminals = self._env.step, self._env.terminal_mask
 
         for _ in range(self._max_iters):
-            state = self._get_start_state()
+            state, action = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
 
-            for i in range(self._max_steps):
-                if self._env.is_terminal(state):
+            for _ in range(self._max_steps):
+                if terminals[state]:
                     break
 
-                action = utils.get_action(self._policy.get(state, utils.calc_action_probabilities(self._env.actions)))
-                next_state = self._env.next_state(state, action)
-                reward = self._env.reward(state, action, next_state)
+                if action < 0:
+                    action = utils.sample_action(self._policy[state])
+
+                next_state, reward = env_step(state, action)
+                episode_return += reward
 
-                self._q[state][action] += self._alpha * (
-                    reward + self._gamma * max(self._q[next_state].values(), default=0.0) - self._q[state][action]
+                self._q[state, action] += self._alpha * (
+                    reward + self._gamma * np.max(self._q[next_state]) - self._q[state, action]
                 )
+                self._updated[state] = True
+
+                if self._replay is not None:
+                    self._replay.add(state, action, reward, next_state, terminals[next_state])
+                    updates += self._replay_step()
 
+                visited.append(state)
                 state = next_state
+                action = -1
 
-            best_policy = utils.calc_best_policy_from_quality(self._q)
+            self._start_sampler.update(visited)
 
-            for state, action in best_policy.items():
-                self._policy[state] = utils.calc_action_probabilities(self._env.actions, action, self._epsilon)
+            updated = np.flatnonzero(self._updated)
+            self._policy[updated] = utils.calc_epsilon_greedy_probabilities(
+                utils.calc_greedy_actions(self._q[updated]), len(self._env.actions), self._epsilon
+            )
+            self._updated[updated] = False
 
-            iters += i
+            iters += len(visited)
+            updates += len(visited)
+            self._last_return = episode_return
 
-        return iters
+            yield 1, iters, updates
 
     @property
-    def quality(self) -> dict[State, dict[Action, float]]:
-        """Returns the quality of state-action pairs."""
+    def table(self) -> np.ndarray:
+        """Returns [S, A] quality of state-action pairs."""
 
         return self._q
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns the values of states."""
+    def quality(self) -> dict[State, dict[Action, float]]:
+        """Returns the quality of state-action pairs."""
 
-        return utils.calc_values_from_quality(self._q)
+        return utils.quality_to_dict(self._q, self._env)
 
-    @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the best action for each state according to the current policy."""
+    def _replay_step(self) -> int:
+        """Applies replayed minibatch updates once enough replay credit is accumulated, returns number of updates."""
+
+        self._replay_credit += self._replay_ratio
+        updates = 0
 
-        return utils.calc_best_policy_from_quality(self._q)
+        while self._replay_credit >= self._replay_batch_size:
+            self._replay_credit -= self._replay_batch_size
+            updates += self._replay_batch_size
 
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
+            batch = self._replay.sample(self._replay_batch_size)
+            states, actions = batch["state"], batch["action"]
+            targets = batch["reward"] + self._gamma * np.max(self._q[batch["next_state"]], axis=1) * ~batch["done"]
 
-        # We start from a random non-terminal state to ensure that we explore the state space effectively.
-        # If it is allowed by the environment, we could also start from a fixed state or a distribution of states.
+            # All updates of the minibatch are computed from the same Q values, a duplicated pair is updated once.
+            self._q[states, actions] += self._alpha * (targets - self._q[states, actions])
+            self._updated[states] = True
 
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
+        return updates
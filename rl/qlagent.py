@@ -0,0 +1,104 @@
+"""Watkins Q(λ) Agent"""
+
+from typing import Iterator
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from common import EligibilityTraces, TraceType
+from gridworld import Action, GridWorld, State
+from sampling import StartStateSampler
+
+
+class QLambdaAgent(TabularAgent):
+    """Watkins Q(λ) agent with eligibility traces to find the optimal policy for a given GridWorld environment."""
+
+    def __init__(
+        self,
+        env: GridWorld,
+        alpha: float = 0.1,
+        gamma: float = 0.99,
+        lambda_: float = 0.9,
+        epsilon: float = 0.25,
+        trace_type: TraceType = TraceType.ACCUMULATING,
+        max_steps: int = 100,
+        max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
+    ) -> None:
+        self._env = env
+        self._alpha = alpha
+        self._gamma = gamma
+        self._lambda = lambda_
+        self._epsilon = epsilon
+        self._max_steps = max_steps
+        self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._q = np.zeros((env.num_states, len(env.actions)))
+        self._traces = EligibilityTraces(self._q.size, trace_type)
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        num_actions = len(self._env.actions)
+        env_step, terminals = self._env.step, self._env.terminal_mask
+        q = self._q.reshape(-1)
+
+        for _ in range(self._max_iters):
+            state, action = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
+
+            if action < 0:
+                action = utils.sample_epsilon_greedy_action(self._q[state], self._epsilon)
+
+            self._traces.clear()
+
+            for _ in range(self._max_steps):
+                if terminals[state]:
+                    break
+
+                next_state, reward = env_step(state, action)
+                episode_return += reward
+                next_action = utils.sample_epsilon_greedy_action(self._q[next_state], self._epsilon)
+                best_value = np.max(self._q[next_state])
+
+                # Greediness of A' is decided before the update, which may change Q(S', ·) when S' is on the trace
+                greedy = self._q[next_state, next_action] == best_value
+
+                # δ ← R + γ max Q(S', a) - Q(S, A), terminal states are never updated, so Q(terminal, ·) = 0
+                td_error = reward + self._gamma * best_value - self._q[state, action]
+
+                # Q(s, a) ← Q(s, a) + α · δ · e(s, a) for all recently visited state-action pairs
+                self._traces.visit(state * num_actions + action, self._alpha)
+                self._traces.update(q, self._alpha * td_error)
+
+                # Watkins's Q(λ): traces follow the greedy policy only, so they are cut after an exploratory action.
+                if greedy:
+                    self._traces.decay(self._gamma * self._lambda)
+                else:
+                    self._traces.clear()
+
+                visited.append(state)
+                state = next_state
+                action = next_action
+
+            self._start_sampler.update(visited)
+
+            iters += len(visited)
+            updates += len(visited)
+            self._last_return = episode_return
+
+            yield 1, iters, updates
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns [S, A] quality of state-action pairs."""
+
+        return self._q
+
+    @property
+    def quality(self) -> dict[State, dict[Action, float]]:
+        """Returns the quality of state-action pairs."""
+
+        return utils.quality_to_dict(self._q, self._env)
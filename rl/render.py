@@ -0,0 +1,369 @@
+"""Rendering of value, Q and policy tables of large GridWorlds to PNG images and cropped text windows.
+
+Images are rendered in bands of grid rows: every band is colormapped with one lookup table indexing, scaled with
+array reshapes and streamed into the PNG encoder, so memory mapped tables of any size are never fully loaded. Grids
+larger than the image are downsampled by block averaging, small ones are upscaled to cells of several pixels.
+"""
+
+import math
+import struct
+import zlib
+from typing import Callable, Iterator
+
+import numpy as np
+from gridworld import Action, GridWorld
+
+# Anchor colors of the viridis colormap, interpolated to a 256 entries lookup table
+_VIRIDIS = np.array(
+    [
+        [68, 1, 84],
+        [72, 40, 120],
+        [62, 74, 137],
+        [49, 104, 142],
+        [38, 130, 142],
+        [31, 158, 137],
+        [53, 183, 121],
+        [109, 205, 89],
+        [180, 222, 44],
+        [253, 231, 37],
+    ],
+    dtype=float,
+)
+COLORMAP = np.stack(
+    [np.interp(np.linspace(0.0, 1.0, 256), np.linspace(0.0, 1.0, len(_VIRIDIS)), _VIRIDIS[:, i]) for i in range(3)],
+    axis=1,
+).astype(np.uint8)
+
+WALL_COLOR = np.array([48, 48, 48], dtype=np.uint8)
+TERMINAL_COLOR = np.array([255, 255, 255], dtype=np.uint8)
+BACKGROUND_COLOR = np.array([224, 224, 224], dtype=np.uint8)
+ARROW_COLOR = np.array([0, 0, 0], dtype=np.uint8)
+
+# Minimum cell sizes in pixels: arrows and Q triangles are not readable in smaller cells
+MIN_ARROW_CELL = 9
+MIN_QUALITY_CELL = 12
+
+# Pixels rendered at once, bounds memory of a band
+BAND_PIXELS = 1 << 22
+
+# zlib level of PNG data: compression dominates rendering time of large images, fast levels keep it in seconds
+COMPRESSION_LEVEL = 1
+
+
+def render_values(
+    values: np.ndarray,
+    env: GridWorld,
+    path: str,
+    cell_size: int | None = None,
+    max_pixels: int = 4096,
+    value_range: tuple[float, float] | None = None,
+) -> None:
+    """Renders [S] or [rows, cols] state values as a heatmap PNG, walls and terminal states have fixed colors."""
+    values = np.asarray(values).reshape(env.size)
+    value_range = value_range or _calc_range(values, env)
+    factor, cell = _calc_layout(env.size, 1, cell_size, max_pixels)
+
+    def render_band(r0: int, r1: int) -> np.ndarray:
+        colors = _colorize(_downsample(_mask_absorbing(values[r0:r1], env, r0, r1), factor), value_range)
+
+        return _upscale(_paint_absorbing(colors, env, r0, r1, factor), cell)
+
+    _write_png(path, _render_bands(env.size, factor, cell, render_band), _image_size(env.size, factor, cell))
+
+
+def render_quality(
+    q: np.ndarray,
+    env: GridWorld,
+    path: str,
+    cell_size: int | None = None,
+    max_pixels: int = 4096,
+    value_range: tuple[float, float] | None = None,
+) -> None:
+    """Renders [S, A] or [rows, cols, A] action values as a PNG of cells split into one triangle per action."""
+    q = np.asarray(q).reshape(env.size + (len(env.actions),))
+    value_range = value_range or _calc_range(q, env)
+    factor, cell = _calc_layout(env.size, MIN_QUALITY_CELL, cell_size, max_pixels)
+    triangles = _make_triangles(cell)
+
+    def render_band(r0: int, r1: int) -> np.ndarray:
+        band = _mask_absorbing(q[r0:r1], env, r0, r1)
+        blocks = np.stack([_downsample(band[..., action], factor) for action in range(band.shape[2])], axis=2)
+        colors = _colorize(blocks, value_range)
+
+        # [h, w, A, 3] action colors -> [h, w, cell, cell, 3] pixels of the triangles -> [h · cell, w · cell, 3]
+        pixels = colors[:, :, triangles]
+        pixels[_block_absorbing(env, r0, r1, factor)] = _absorbing_colors(env, r0, r1, factor)[:, None, None]
+
+        return pixels.transpose(0, 2, 1, 3, 4).reshape(pixels.shape[0] * cell, pixels.shape[1] * cell, 3)
+
+    _write_png(path, _render_bands(env.size, factor, cell, render_band), _image_size(env.size, factor, cell))
+
+
+def render_policy(
+    actions: np.ndarray,
+    env: GridWorld,
+    path: str,
+    values: np.ndarray | None = None,
+    cell_size: int | None = None,
+    max_pixels: int = 4096,
+) -> None:
+    """Renders [S] or [rows, cols] action indices as arrows (quiver) over a value heatmap or a plain background.
+
+    Downsampled blocks show their most frequent action.
+    """
+    actions = np.asarray(actions).reshape(env.size)
+    values = None if values is None else np.asarray(values).reshape(env.size)
+    value_range = _calc_range(values, env) if values is not None else (0.0, 1.0)
+    factor, cell = _calc_layout(env.size, MIN_ARROW_CELL, cell_size, max_pixels)
+    arrows = _make_arrows(cell)
+
+    def render_band(r0: int, r1: int) -> np.ndarray:
+        if values is None:
+            shape = (math.ceil((r1 - r0) / factor), math.ceil(env.size[1] / factor))
+            colors = np.broadcast_to(BACKGROUND_COLOR, shape + (3,)).copy()
+        else:
+            colors = _colorize(_downsample(_mask_absorbing(values[r0:r1], env, r0, r1), factor), value_range)
+
+        colors = _paint_absorbing(colors, env, r0, r1, factor)
+        pixels = np.broadcast_to(colors[:, :, None, None], colors.shape[:2] + (cell, cell, 3)).copy()
+
+        # Arrow sprites of the block actions are stamped over running states with one masked assignment
+        block_actions = _downsample_actions(actions[r0:r1], factor, len(env.actions))
+        mask = arrows[block_actions] & ~_block_absorbing(env, r0, r1, factor)[:, :, None, None]
+        pixels[mask] = ARROW_COLOR
+
+        return pixels.transpose(0, 2, 1, 3, 4).reshape(pixels.shape[0] * cell, pixels.shape[1] * cell, 3)
+
+    _write_png(path, _render_bands(env.size, factor, cell, render_band), _image_size(env.size, factor, cell))
+
+
+def format_window(
+    table: np.ndarray, env: GridWorld, origin: tuple[int, int] = (0, 0), shape: tuple[int, int] = (16, 16)
+) -> str:
+    """Formats a cropped window of a table for terminal inspection.
+
+    Integer [S] tables are formatted as policy arrows, float [S] tables as values and [S, A] tables as action values in
+    the compass layout of utils.format_quality. Walls are shown as "#" and terminal states as "T".
+    """
+    rows, cols = env.size
+    r0, c0 = max(origin[0], 0), max(origin[1], 0)
+    r1, c1 = min(r0 + shape[0], rows), min(c0 + shape[1], cols)
+    table = np.asarray(table)
+
+    if table.shape[0] == env.num_states:
+        table = table.reshape(env.size + table.shape[1:])
+
+    window = np.asarray(table[r0:r1, c0:c1])
+    walls = env.wall_mask.reshape(env.size)[r0:r1, c0:c1]
+    terminals = env.terminal_mask.reshape(env.size)[r0:r1, c0:c1] & ~walls
+    lines = [f"rows {r0}..{r1 - 1}, cols {c0}..{c1 - 1} of {rows}x{cols}"]
+
+    if window.ndim == 3:
+        return "\n".join(lines + _format_quality_window(window, walls, terminals))
+
+    if np.issubdtype(window.dtype, np.integer):
+        cells = np.array(["↑", "→", "↓", "←"])[np.clip(window, 0, len(Action) - 1)]
+        wall, terminal = "#", "T"
+    else:
+        cells = np.char.mod("%6.3f", window.astype(float))
+        wall, terminal = f"{'#':>6}", f"{'T':>6}"
+
+    cells = np.where(walls, wall, np.where(terminals, terminal, cells))
+
+    return "\n".join(lines + [" ".join(row) for row in cells])
+
+
+def _format_quality_window(window: np.ndarray, walls: np.ndarray, terminals: np.ndarray) -> list[str]:
+    """Returns lines of [rows, cols, A] action values in the compass layout."""
+    val_w = 6
+    cell_w = val_w * 2 + 1
+    lines = []
+
+    for r in range(window.shape[0]):
+        top_row, mid_row, bot_row = [], [], []
+
+        for c in range(window.shape[1]):
+            if walls[r, c] or terminals[r, c]:
+                top_row.append(" " * cell_w)
+                mid_row.append(f"{'#' if walls[r, c] else 'T':^{cell_w}}")
+                bot_row.append(" " * cell_w)
+                continue
+
+            up, right, down, left = (f"{window[r, c, action]:{val_w}.3f}" for action in Action)
+            top_row.append(f"{up:^{cell_w}}")
+            mid_row.append(f"{left} {right}")
+            bot_row.append(f"{down:^{cell_w}}")
+
+        lines += [" ".join(top_row), " ".join(mid_row), " ".join(bot_row)]
+
+    return lines
+
+
+def _calc_layout(size: tuple[int, int], min_cell: int, cell_size: int | None, max_pixels: int) -> tuple[int, int]:
+    """Returns (grid cells per block side, pixels per block side) fitting the image into max_pixels."""
+    cell = cell_size or int(np.clip(max_pixels // max(size), min_cell, 32))
+    factor = max(1, math.ceil(max(size) * cell / max_pixels))
+
+    return factor, cell
+
+
+def _image_size(size: tuple[int, int], factor: int, cell: int) -> tuple[int, int]:
+    """Returns image (height, width) in pixels."""
+    return math.ceil(size[0] / factor) * cell, math.ceil(size[1] / factor) * cell
+
+
+def _render_bands(
+    size: tuple[int, int], factor: int, cell: int, render_band: Callable[[int, int], np.ndarray]
+) -> Iterator[np.ndarray]:
+    """Yields image bands rendered from bands of grid rows, a band is a whole number of blocks."""
+    band_blocks = max(1, BAND_PIXELS // (math.ceil(size[1] / factor) * cell * cell))
+
+    for r0 in range(0, size[0], band_blocks * factor):
+        yield render_band(r0, min(r0 + band_blocks * factor, size[0]))
+
+
+def _calc_range(table: np.ndarray, env: GridWorld) -> tuple[float, float]:
+    """Returns (min, max) of the table over non-absorbing states, computed band by band for memory maps."""
+    low, high = np.inf, -np.inf
+    absorbing = env.terminal_mask.reshape(env.size)
+    step = max(1, BAND_PIXELS // env.size[1])
+
+    for r0 in range(0, env.size[0], step):
+        band = np.asarray(table[r0 : r0 + step])[~absorbing[r0 : r0 + step]]
+
+        if band.size:
+            low, high = min(low, float(np.nanmin(band))), max(high, float(np.nanmax(band)))
+
+    return (low, high) if low < high else (low - 0.5, low + 0.5) if np.isfinite(low) else (0.0, 1.0)
+
+
+def _mask_absorbing(band: np.ndarray, env: GridWorld, r0: int, r1: int) -> np.ndarray:
+    """Returns float copy of [h, cols, ...] band with NaN in absorbing states, so they do not affect block means."""
+    band = np.array(band, dtype=float)
+    band[env.terminal_mask.reshape(env.size)[r0:r1]] = np.nan
+
+    return band
+
+
+def _downsample(band: np.ndarray, factor: int) -> np.ndarray:
+    """Returns [h / factor, w / factor] means of factor x factor blocks of [h, w] band ignoring NaN."""
+    if factor == 1:
+        return band
+
+    h, w = band.shape
+    padded = np.full((math.ceil(h / factor) * factor, math.ceil(w / factor) * factor), np.nan)
+    padded[:h, :w] = band
+    blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+    valid = ~np.isnan(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0.0).sum(axis=(1, 3))
+
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _downsample_actions(band: np.ndarray, factor: int, num_actions: int) -> np.ndarray:
+    """Returns [h / factor, w / factor] most frequent action of factor x factor blocks of [h, w] band."""
+    band = np.clip(np.asarray(band, dtype=np.int64), 0, num_actions - 1)
+
+    if factor == 1:
+        return band
+
+    h, w = band.shape
+    padded = np.full((math.ceil(h / factor) * factor, math.ceil(w / factor) * factor), num_actions)
+    padded[:h, :w] = band
+    blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+    counts = np.stack([np.count_nonzero(blocks == action, axis=(1, 3)) for action in range(num_actions)], axis=2)
+
+    return np.argmax(counts, axis=2)
+
+
+def _colorize(values: np.ndarray, value_range: tuple[float, float]) -> np.ndarray:
+    """Returns [..., 3] colors of values by one colormap lookup, NaN values get the wall color."""
+    low, high = value_range
+    scaled = (np.nan_to_num(values, nan=low) - low) * (255.0 / (high - low))
+    colors = COLORMAP[np.clip(scaled, 0, 255).astype(np.uint8)]
+    colors[np.isnan(values)] = WALL_COLOR
+
+    return colors
+
+
+def _block_absorbing(env: GridWorld, r0: int, r1: int, factor: int) -> np.ndarray:
+    """Returns [h / factor, w / factor] mask of blocks of absorbing states only."""
+    absorbing = env.terminal_mask.reshape(env.size)[r0:r1].astype(float)
+
+    return _downsample(absorbing, factor) == 1.0
+
+
+def _absorbing_colors(env: GridWorld, r0: int, r1: int, factor: int) -> np.ndarray:
+    """Returns colors of absorbing blocks: terminal color if the block has a terminal state, wall color otherwise."""
+    walls = env.wall_mask.reshape(env.size)[r0:r1]
+    terminals = env.terminal_mask.reshape(env.size)[r0:r1] & ~walls
+    blocks = _block_absorbing(env, r0, r1, factor)
+    has_terminal = _downsample(terminals.astype(float), factor) > 0.0
+
+    return np.where(has_terminal[blocks][:, None], TERMINAL_COLOR, WALL_COLOR).astype(np.uint8)
+
+
+def _paint_absorbing(colors: np.ndarray, env: GridWorld, r0: int, r1: int, factor: int) -> np.ndarray:
+    """Paints blocks of absorbing states of [h, w, 3] colors with wall and terminal colors."""
+    colors[_block_absorbing(env, r0, r1, factor)] = _absorbing_colors(env, r0, r1, factor)
+
+    return colors
+
+
+def _upscale(colors: np.ndarray, cell: int) -> np.ndarray:
+    """Returns [h · cell, w · cell, 3] image of [h, w, 3] block colors."""
+    if cell == 1:
+        return colors
+
+    h, w, _ = colors.shape
+
+    return np.broadcast_to(colors[:, None, :, None], (h, cell, w, cell, 3)).reshape(h * cell, w * cell, 3)
+
+
+def _make_arrows(cell: int) -> np.ndarray:
+    """Returns [A, cell, cell] boolean arrow sprites in Action order."""
+    y, x = np.mgrid[0:cell, 0:cell] + 0.5
+    mid, head = cell / 2, cell * 0.3
+    tip = cell * 0.85
+
+    # Arrow pointing right: shaft along the middle row and a triangular head
+    shaft = (np.abs(y - mid) <= max(cell * 0.06, 0.5)) & (x >= cell * 0.15) & (x <= tip - head / 2)
+    tip_head = (x <= tip) & (x >= tip - head) & (np.abs(y - mid) <= (tip - x) * 0.8 + 0.5)
+    right = shaft | tip_head
+
+    return np.stack([np.rot90(right, 1), right, np.rot90(right, -1), np.rot90(right, 2)])
+
+
+def _make_triangles(cell: int) -> np.ndarray:
+    """Returns [cell, cell] action index of each pixel: the triangle towards the nearest cell side."""
+    y, x = np.mgrid[0:cell, 0:cell]
+    distances = np.stack([y, cell - 1 - x, cell - 1 - y, x])  # to the UP, RIGHT, DOWN and LEFT sides
+
+    return np.argmin(distances, axis=0)
+
+
+def _write_png(path: str, bands: Iterator[np.ndarray], size: tuple[int, int], level: int = COMPRESSION_LEVEL) -> None:
+    """Writes RGB PNG file of [height, width, 3] uint8 image given as bands of rows, compressed as they are rendered."""
+    height, width = size
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    compressor = zlib.compressobj(level)
+
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+
+        for band in bands:
+            # Every row starts with filter type 0 (none)
+            rows = np.zeros((band.shape[0], width * 3 + 1), dtype=np.uint8)
+            rows[:, 1:] = band.reshape(band.shape[0], width * 3)
+            data = compressor.compress(rows.tobytes())
+
+            if data:
+                file.write(chunk(b"IDAT", data))
+
+        file.write(chunk(b"IDAT", compressor.flush()))
+        file.write(chunk(b"IEND", b""))
@@ -1,40 +1,67 @@
 """Reinforcement learning algorithms for GridWorld environment."""
 
+import sys
+
 from acagent import ActorCriticAgent
+from dynaqagent import DynaQAgent
+from evaluation import PolicyEvaluator
+from experiment import format_summary, make_jobs, run_jobs, save_results, summarize
 from gridworld import GridWorld
+from linagent import LinearAgent
 from mcqagent import MonteCarloQAgent
 from mcvagent import MonteCarloValueAgent
 from pgagent import PolicyGradientAgent
 from pgbagent import PolicyGradientBaselineAgent
 from piagent import PolicyIterationAgent
+from profiling import format_profile
+from psagent import PrioritizedSweepingAgent
 from qagent import QLearningAgent
+from qlagent import QLambdaAgent
 from sarsaagent import SARSAAgent
+from sarsalagent import SARSALambdaAgent
 from tdagent import TemporalDifferenceAgent
+from tdlagent import TemporalDifferenceLambdaAgent
 from utils import format_policy, format_quality, format_values
 from viagent import ValueIterationAgent
 
 
-def main() -> None:
+AGENTS = (
+    ValueIterationAgent,
+    PolicyIterationAgent,
+    MonteCarloValueAgent,
+    MonteCarloQAgent,
+    TemporalDifferenceAgent,
+    SARSAAgent,
+    QLearningAgent,
+    TemporalDifferenceLambdaAgent,
+    SARSALambdaAgent,
+    QLambdaAgent,
+    DynaQAgent,
+    PrioritizedSweepingAgent,
+    PolicyGradientAgent,
+    PolicyGradientBaselineAgent,
+    ActorCriticAgent,
+    LinearAgent,
+)
+
+
+def main(profile: bool = False) -> None:
     env = GridWorld()
 
-    agents = (
-        ValueIterationAgent(env),
-        PolicyIterationAgent(env),
-        MonteCarloValueAgent(env),
-        MonteCarloQAgent(env),
-        TemporalDifferenceAgent(env),
-        SARSAAgent(env),
-        QLearningAgent(env),
-        PolicyGradientAgent(env),
-        PolicyGradientBaselineAgent(env),
-        ActorCriticAgent(env),
-    )
+    agents = tuple(agent_class(env) for agent_class in AGENTS)
+
+    evaluator = PolicyEvaluator(env)
 
     for agent in agents:
+        if profile:
+            agent.enable_profiling()
+
         iters = agent.train()
+        evaluation = evaluator.evaluate(agent)
 
         print("\n==============================================================================")
         print(f"{agent.__class__.__name__} converged in {iters} iterations.")
+        print(f"Greedy policy regret: mean {evaluation.mean_regret:.4f}, max {evaluation.max_regret:.4f}.")
         print("==============================================================================")
 
         if hasattr(agent, "quality"):
@@ -47,6 +74,10 @@ def main() -> None:
         print("\nPolicy:\n")
         print(format_policy(agent.policy, env))
 
+        if agent.profile is not None:
+            print("\nProfile:\n")
+            print(format_profile(agent.profile))
+
     return
 
     agent = QLearningAgent(env)
@@ -83,5 +114,18 @@ def main() -> None:
     print(format_policy(policy, env))
 
 
+def compare(num_seeds: int = 5, processes: int | None = None, path: str | None = None) -> None:
+    """Trains all agents with default hyperparameters over num_seeds seeds in parallel and prints summary."""
+    results = run_jobs(make_jobs([(agent_class, {}) for agent_class in AGENTS], num_seeds), processes)
+
+    print(format_summary(summarize(results)))
+
+    if path is not None:
+        save_results(results, path)
+
+
 if __name__ == "__main__":
-    main()
+    if "--compare" in sys.argv[1:]:
+        compare()
+    else:
+        main(profile="--profile" in sys.argv[1:])
@@ -0,0 +1,197 @@
+"""Start state samplers for the GridWorld environment agents."""
+
+import numpy as np
+from gridworld import GridWorld
+
+
+class AliasTable:
+    """Walker's alias table: O(1) sampling from a fixed discrete distribution."""
+
+    def __init__(self, weights: np.ndarray) -> None:
+        n = len(weights)
+        probabilities = np.asarray(weights, dtype=float) * n / np.sum(weights)
+
+        self._probabilities = np.ones(n)
+        self._aliases = np.arange(n)
+
+        small = list(np.flatnonzero(probabilities < 1.0))
+        large = list(np.flatnonzero(probabilities >= 1.0))
+
+        # Vose's method: every small bucket is topped up by a large one
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probabilities[less] = probabilities[less]
+            self._aliases[less] = more
+            probabilities[more] -= 1.0 - probabilities[less]
+
+            if probabilities[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+    def sample(self, size: int | None = None) -> int | np.ndarray:
+        """Returns a sampled index or array of indices."""
+        if size is None:
+            i = np.random.randint(len(self._probabilities))
+
+            return int(i) if np.random.random() < self._probabilities[i] else int(self._aliases[i])
+
+        i = np.random.randint(len(self._probabilities), size=size)
+
+        return np.where(np.random.random(size) < self._probabilities[i], i, self._aliases[i])
+
+
+class FenwickTree:
+    """Fenwick (binary indexed) tree of weights: O(log n) weight update and sampling proportional to weights."""
+
+    def __init__(self, weights: np.ndarray) -> None:
+        self._tree = np.zeros(len(weights) + 1)
+        self._weights = np.zeros(len(weights))
+        self.set(np.arange(len(weights)), weights)
+
+    @property
+    def total(self) -> float:
+        """Returns sum of all weights."""
+        return self._tree_total()
+
+    def set(self, indices: np.ndarray, weights: np.ndarray) -> None:
+        """Sets weights of the given indices."""
+        indices = np.asarray(indices)
+        deltas = np.asarray(weights, dtype=float) - self._weights[indices]
+        self._weights[indices] += deltas
+
+        if len(indices) * np.log2(len(self._tree)) < len(self._tree):
+            for index, delta in zip(indices + 1, deltas):
+                while index < len(self._tree):
+                    self._tree[index] += delta
+                    index += index & -index
+        else:
+            # Many changes: rebuild in O(n), tree[i] holds sum of weights (i - lowbit(i), i]
+            cum = np.concatenate(([0.0], np.cumsum(self._weights)))
+            i = np.arange(1, len(self._tree))
+            self._tree[1:] = cum[i] - cum[i - (i & -i)]
+
+    def sample(self) -> int:
+        """Returns an index sampled proportionally to its weight."""
+        u = np.random.random() * self.total
+        index = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+
+        while step:
+            next_index = index + step
+
+            if next_index < len(self._tree) and self._tree[next_index] <= u:
+                index = next_index
+                u -= self._tree[next_index]
+
+            step >>= 1
+
+        return min(index, len(self._weights) - 1)
+
+    def _tree_total(self) -> float:
+        """Returns sum of all weights accumulated in the tree."""
+        total = 0.0
+        index = len(self._tree) - 1
+
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+
+        return total
+
+
+class StartStateSampler:
+    """Samples start states of episodes uniformly from non-terminal states.
+
+    Terminal states are excluded, because episodes started there have zero length. Samplers return flat state indices
+    and a start action index, -1 means the first action is chosen by the agent policy.
+    """
+
+    def __init__(self, env: GridWorld) -> None:
+        self._env = env
+        self._states = np.flatnonzero(~env.terminal_mask)
+
+    def sample(self) -> tuple[int, int]:
+        """Returns start state index and start action index."""
+        return int(self._states[np.random.randint(len(self._states))]), -1
+
+    def sample_batch(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        """Returns arrays of start state indices and start action indices."""
+        return self._states[np.random.randint(len(self._states), size=size)], np.full(size, -1)
+
+    def update(self, states: np.ndarray | list[int]) -> None:
+        """Records states visited during an episode."""
+        _ = states  # Unused by uniform sampling, but included for samplers driven by visit counts.
+
+
+class ExploringStartsSampler(StartStateSampler):
+    """Samples start state-action pairs uniformly, so every pair has a chance to be tried (exploring starts).
+
+    Agents learning state values only use the start state.
+    """
+
+    def sample(self) -> tuple[int, int]:
+        index = np.random.randint(len(self._states) * len(self._env.actions))
+        state, action = divmod(index, len(self._env.actions))
+
+        return int(self._states[state]), action
+
+    def sample_batch(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        states, actions = np.divmod(
+            np.random.randint(len(self._states) * len(self._env.actions), size=size), len(self._env.actions)
+        )
+
+        return self._states[states], actions
+
+
+class DistributionStartSampler(StartStateSampler):
+    """Samples start states from a fixed distribution over non-terminal states with an alias table."""
+
+    def __init__(self, env: GridWorld, weights: np.ndarray) -> None:
+        super().__init__(env)
+        self._table = AliasTable(np.asarray(weights, dtype=float)[self._states])
+
+    def sample(self) -> tuple[int, int]:
+        return int(self._states[self._table.sample()]), -1
+
+    def sample_batch(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        return self._states[self._table.sample(size)], np.full(size, -1)
+
+
+class VisitBalancedStartSampler(StartStateSampler):
+    """Samples rarely visited states more often: weight of a state is (1 + visits)^-power.
+
+    Weights are kept in a Fenwick tree, so both visit count updates and sampling are O(log S).
+    """
+
+    def __init__(self, env: GridWorld, power: float = 1.0) -> None:
+        super().__init__(env)
+        self._power = power
+        self._positions = np.full(env.num_states, -1)
+        self._positions[self._states] = np.arange(len(self._states))
+        self._counts = np.zeros(len(self._states), dtype=np.int64)
+        self._tree = FenwickTree(np.ones(len(self._states)))
+
+    @property
+    def state_counts(self) -> np.ndarray:
+        """Returns [S] array of recorded visit counts."""
+        counts = np.zeros(self._env.num_states, dtype=np.int64)
+        counts[self._states] = self._counts
+
+        return counts
+
+    def sample(self) -> tuple[int, int]:
+        return int(self._states[self._tree.sample()]), -1
+
+    def sample_batch(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        return np.array([self._states[self._tree.sample()] for _ in range(size)], dtype=np.int64), np.full(size, -1)
+
+    def update(self, states: np.ndarray | list[int]) -> None:
+        positions = self._positions[np.asarray(states, dtype=np.int64)]
+        positions, counts = np.unique(positions[positions >= 0], return_counts=True)
+
+        if len(positions) == 0:
+            return
+
+        self._counts[positions] += counts
+        self._tree.set(positions, (1.0 + self._counts[positions]) ** -self._power)
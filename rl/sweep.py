@@ -0,0 +1,352 @@
+"""Hyperparameter sweeps of GridWorld agents with grid, random and successive halving / Hyperband strategies."""
+
+import itertools
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import Manager
+from typing import Any, Sequence
+
+import numpy as np
+from agent import TabularAgent
+from evaluation import PolicyEvaluator
+from experiment import format_params
+from gridworld import GridWorld
+
+
+@dataclass(frozen=True)
+class Uniform:
+    """Continuous uniform distribution of a hyperparameter."""
+
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator) -> float:
+        """Returns a sampled value."""
+        return float(rng.uniform(self.low, self.high))
+
+
+@dataclass(frozen=True)
+class LogUniform:
+    """Log-uniform distribution of a hyperparameter, e.g. for step sizes."""
+
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator) -> float:
+        """Returns a sampled value."""
+        return float(np.exp(rng.uniform(np.log(self.low), np.log(self.high))))
+
+
+@dataclass(frozen=True)
+class IntUniform:
+    """Uniform distribution of an integer hyperparameter, both bounds included."""
+
+    low: int
+    high: int
+
+    def sample(self, rng: np.random.Generator) -> int:
+        """Returns a sampled value."""
+        return int(rng.integers(self.low, self.high + 1))
+
+
+def grid_search(space: dict[str, Sequence[Any]]) -> list[dict[str, Any]]:
+    """Returns all combinations of the hyperparameter values."""
+    names = list(space)
+
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space: dict[str, Any], num_trials: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Returns num_trials configurations, values are sampled from distributions or chosen from lists."""
+    rng = np.random.default_rng(seed)
+
+    return [
+        {
+            name: values.sample(rng) if hasattr(values, "sample") else values[rng.integers(len(values))]
+            for name, values in space.items()
+        }
+        for _ in range(num_trials)
+    ]
+
+
+class Pruner:
+    """Never prunes: trials are evaluated every eval_every episodes and trained to max_episodes."""
+
+    def __init__(self, eval_every: int = 100) -> None:
+        self._eval_every = eval_every
+
+    def checkpoints(self, trial: int, max_episodes: int) -> list[int]:
+        """Returns episode counts at which the trial is evaluated, the last one is max_episodes."""
+        return list(range(self._eval_every, max_episodes, self._eval_every)) + [max_episodes]
+
+    def bracket(self, trial: int) -> int:
+        """Returns bracket of the trial, trials are only compared inside a bracket."""
+        _ = trial
+
+        return 0
+
+    def should_prune(self, scores: Sequence[float], score: float) -> bool:
+        """Returns True if the trial with score should stop, scores are all reported at the same checkpoint."""
+        _ = scores, score
+
+        return False
+
+
+class MedianPruner(Pruner):
+    """Prunes a trial whose regret at a checkpoint is worse than the median of other trials at the same checkpoint."""
+
+    def __init__(self, eval_every: int = 100, min_trials: int = 5) -> None:
+        super().__init__(eval_every)
+        self._min_trials = min_trials
+
+    def should_prune(self, scores: Sequence[float], score: float) -> bool:
+        return len(scores) >= self._min_trials and score > float(np.median(scores))
+
+
+class SuccessiveHalvingPruner(Pruner):
+    """Asynchronous successive halving: rungs at min_episodes · etaᵏ, only the best 1/eta of a rung continue.
+
+    A trial reaching a rung is compared with all trials which reached it before, so trials do not wait for each other
+    and parallel workers stay busy.
+    """
+
+    def __init__(self, min_episodes: int = 50, eta: int = 3) -> None:
+        super().__init__(min_episodes)
+        self._min_episodes = min_episodes
+        self._eta = eta
+
+    def checkpoints(self, trial: int, max_episodes: int) -> list[int]:
+        rungs = []
+        episodes = self._min_episodes * self._eta ** self.bracket(trial)
+
+        while episodes < max_episodes:
+            rungs.append(episodes)
+            episodes *= self._eta
+
+        return rungs + [max_episodes]
+
+    def should_prune(self, scores: Sequence[float], score: float) -> bool:
+        if len(scores) < self._eta:
+            return False
+
+        rank = int(np.count_nonzero(np.asarray(scores) < score))
+
+        return rank >= max(1, len(scores) // self._eta)
+
+
+class HyperbandPruner(SuccessiveHalvingPruner):
+    """Hyperband: trials are assigned round robin to successive halving brackets with growing min_episodes.
+
+    Aggressive brackets find good settings cheaply, conservative ones protect slowly starting configurations.
+    """
+
+    def __init__(self, min_episodes: int = 50, max_episodes: int = 1000, eta: int = 3) -> None:
+        super().__init__(min_episodes, eta)
+        self._num_brackets = int(math.log(max(max_episodes // min_episodes, 1), eta)) + 1
+
+    def bracket(self, trial: int) -> int:
+        return trial % self._num_brackets
+
+
+@dataclass(frozen=True)
+class Trial:
+    """Sweep trial: agent hyperparameters and training seed."""
+
+    index: int
+    agent_class: type[TabularAgent]
+    params: dict[str, Any]
+    env_params: dict[str, Any]
+    seed: int
+    max_episodes: int
+
+
+@dataclass
+class TrialResult:
+    """Result of a sweep trial, scores are (episodes, mean regret) at the evaluated checkpoints."""
+
+    agent: str
+    params: dict[str, Any]
+    seed: int
+    episodes: int = 0
+    iterations: int = 0
+    regret: float = float("inf")
+    pruned: bool = False
+    wall_time: float = 0.0
+    scores: list[tuple[int, float]] = field(default_factory=list)
+
+
+class SweepStore:
+    """JSON lines file of finished trials, so repeated sweeps reuse results of already run trials."""
+
+    def __init__(self, path: str | None) -> None:
+        self._path = path
+        self._results: dict[str, TrialResult] = {}
+
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    result = TrialResult(**record["result"])
+                    result.scores = [tuple(score) for score in result.scores]
+                    self._results[record["key"]] = result
+
+    @staticmethod
+    def key(trial: Trial, pruner: Pruner) -> str:
+        """Returns key identifying a trial result."""
+        return "|".join(
+            [
+                trial.agent_class.__name__,
+                format_params(trial.params),
+                format_params(trial.env_params),
+                str(trial.seed),
+                str(trial.max_episodes),
+                ",".join(map(str, pruner.checkpoints(trial.index, trial.max_episodes))),
+            ]
+        )
+
+    def get(self, key: str) -> TrialResult | None:
+        """Returns stored result or None."""
+        return self._results.get(key)
+
+    def put(self, key: str, result: TrialResult) -> None:
+        """Stores result and appends it to the file.
+
+        Parameter values JSON can not encode (enums, config objects) are written as text, as in the key.
+        """
+        self._results[key] = result
+
+        if self._path is not None:
+            with open(self._path, "a", encoding="utf-8") as file:
+                file.write(json.dumps({"key": key, "result": asdict(result)}, default=str) + "\n")
+
+
+def run_trial(trial: Trial, pruner: Pruner, rungs: Any, lock: Any) -> TrialResult:
+    """Trains agent of the trial, evaluates it at checkpoints and stops when the pruner says so.
+
+    rungs maps (bracket, checkpoint) to scores reported by all trials and is shared between processes.
+    """
+    random.seed(trial.seed)
+    np.random.seed(trial.seed)
+
+    env = GridWorld(**trial.env_params)
+    agent = trial.agent_class(env, **{"max_iters": trial.max_episodes, **trial.params})
+    evaluator = PolicyEvaluator(env, agent.gamma)
+    checkpoints = pruner.checkpoints(trial.index, trial.max_episodes)
+    bracket = pruner.bracket(trial.index)
+    result = TrialResult(trial.agent_class.__name__, trial.params, trial.seed)
+    start_time = time.perf_counter()
+
+    for progress in agent.train_iter(report_every=1):
+        result.episodes, result.iterations = progress.episodes, progress.iterations
+        finished = progress.converged or progress.episodes >= trial.max_episodes
+
+        if not checkpoints or (progress.episodes < checkpoints[0] and not finished):
+            continue
+
+        result.regret = evaluator.evaluate(agent).mean_regret
+        result.scores.append((progress.episodes, result.regret))
+
+        # Batched agents may step over several checkpoints at once, the score is reported to all of them.
+        while checkpoints and (checkpoints[0] <= progress.episodes or finished):
+            checkpoint = checkpoints.pop(0)
+
+            with lock:
+                scores = list(rungs.get((bracket, checkpoint), ()))
+                rungs[(bracket, checkpoint)] = tuple(scores) + (result.regret,)
+
+            if checkpoints and pruner.should_prune(scores, result.regret):
+                result.pruned = True
+                checkpoints.clear()
+
+        if not checkpoints:
+            break
+
+    result.wall_time = time.perf_counter() - start_time
+
+    return result
+
+
+class Sweep:
+    """Runs trials of an agent class over hyperparameter configurations in parallel with early pruning."""
+
+    def __init__(
+        self,
+        agent_class: type[TabularAgent],
+        max_episodes: int = 1000,
+        pruner: Pruner | None = None,
+        env_params: dict[str, Any] | None = None,
+        seed: int = 0,
+        path: str | None = None,
+    ) -> None:
+        self._agent_class = agent_class
+        self._max_episodes = max_episodes
+        self._pruner = pruner or Pruner()
+        self._env_params = env_params or {}
+        self._seed = seed
+        self._store = SweepStore(path)
+
+    def run(self, configs: Sequence[dict[str, Any]], processes: int | None = None) -> list[TrialResult]:
+        """Runs trials of all configurations, returns results sorted from the best: finished by regret, then pruned."""
+        seeds = np.random.SeedSequence(self._seed).spawn(len(configs))
+        trials = [
+            Trial(i, self._agent_class, config, self._env_params, int(seed.generate_state(1)[0]), self._max_episodes)
+            for i, (config, seed) in enumerate(zip(configs, seeds))
+        ]
+        keys = [SweepStore.key(trial, self._pruner) for trial in trials]
+        results: list[TrialResult | None] = [self._store.get(key) for key in keys]
+
+        # Stored params may hold text of non-JSON values, the matching trial has the original ones
+        for trial, result in zip(trials, results):
+            if result is not None:
+                result.params = trial.params
+
+        pending = [trial for trial, result in zip(trials, results) if result is None]
+
+        # Scores of stored trials take part in pruning decisions of the new ones
+        rungs: dict[tuple[int, int], tuple[float, ...]] = {}
+
+        for trial, result in zip(trials, results):
+            if result is not None:
+                self._add_scores(rungs, trial, result)
+
+        if processes == 1 or len(pending) <= 1:
+            done = self._run_trials(pending, rungs, threading.Lock(), 1)
+        else:
+            with Manager() as manager:
+                shared_rungs = manager.dict(rungs)
+                done = self._run_trials(pending, shared_rungs, manager.Lock(), processes)
+
+        for trial, result in zip(pending, done):
+            results[trial.index] = result
+            self._store.put(keys[trial.index], result)
+
+        return sorted(results, key=lambda result: (result.pruned, result.regret, -result.episodes))
+
+    def _run_trials(self, trials: Sequence[Trial], rungs: Any, lock: Any, processes: int | None) -> list[TrialResult]:
+        """Runs trials sharing rung scores, sequentially if processes is 1."""
+        if processes == 1:
+            return [run_trial(trial, self._pruner, rungs, lock) for trial in trials]
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(run_trial, trial, self._pruner, rungs, lock) for trial in trials]
+
+            return [future.result() for future in futures]
+
+    def _add_scores(self, rungs: dict[tuple[int, int], tuple[float, ...]], trial: Trial, result: TrialResult) -> None:
+        """Adds checkpoint scores of a stored trial result to rungs."""
+        bracket = self._pruner.bracket(trial.index)
+
+        for checkpoint in self._pruner.checkpoints(trial.index, trial.max_episodes):
+            scores = [regret for episodes, regret in result.scores if episodes >= checkpoint]
+
+            if not scores and (result.pruned or not result.scores):
+                break
+
+            regret = scores[0] if scores else result.scores[-1][1]
+            rungs[(bracket, checkpoint)] = rungs.get((bracket, checkpoint), ()) + (regret,)
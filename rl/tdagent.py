@@ -1,12 +1,16 @@
 """Temporal Difference Agent"""
 
-import random
+from typing import Iterator
 
+import numpy as np
 import utils
-from gridworld import Action, GridWorld, State
+from agent import TabularAgent
+from common import ReplayBuffer, ReplayConfig
+from gridworld import GridWorld
+from sampling import StartStateSampler
 
 
-class TemporalDifferenceAgent:
+class TemporalDifferenceAgent(TabularAgent):
     """Temporal Difference agent to find the optimal policy for a given GridWorld environment."""
 
     def __init__(
@@ -17,6 +21,8 @@ class TemporalDifferenceAgent:
         epsilon: float = 0.25,
         max_steps: int = 100,
         max_iters: int = 1000,
+        replay: ReplayConfig | None = None,
+        start_sampler: StartStateSampler | None = None,
     ) -> None:
         self._env = env
         self._alpha = alpha
@@ -24,60 +30,84 @@ class TemporalDifferenceAgent:
         self._epsilon = epsilon
         self._max_steps = max_steps
         self._max_iters = max_iters
-        self._values: dict[State, float] = {}
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._values = np.zeros(env.num_states)
 
         # we can store only best action for each state and implement e-greedy policy in _generate_episode as:
         # random(epsilon) -> random action, else -> best action. But for generality, we will store the probabilities of
         # taking each action in each state, which allows us to implement more complex policies if needed.
-        self._policy: dict[State, dict[Action, float]] = {}
+        self._policy = np.full((env.num_states, len(env.actions)), 1.0 / len(env.actions))
 
-    def train(self) -> int:
-        """Trains agent."""
+        # Experience replay: replay.ratio replayed transitions per environment step, applied in minibatches
+        replay = replay or ReplayConfig(ratio=0.0)
+        self._replay_ratio = replay.ratio
+        self._replay_batch_size = replay.batch_size
+        self._replay = ReplayBuffer(replay.capacity) if replay.ratio > 0.0 else None
+        self._replay_credit = 0.0
 
-        iters = 0
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        env_step, terminals = self._env.step, self._env.terminal_mask
 
         for _ in range(self._max_iters):
-            state = self._get_start_state()
+            state, _ = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
 
-            for i in range(self._max_steps):
-                if self._env.is_terminal(state):
+            for _ in range(self._max_steps):
+                if terminals[state]:
                     break
 
-                action = utils.get_action(self._policy.get(state, utils.calc_action_probabilities(self._env.actions)))
-                next_state = self._env.next_state(state, action)
-                reward = self._env.reward(state, action, next_state)
+                action = utils.sample_action(self._policy[state])
+                next_state, reward = env_step(state, action)
+                episode_return += reward
 
-                self._values[state] = self._values.get(state, 0.0) + self._alpha * (
-                    reward + self._gamma * self._values.get(next_state, 0.0) - self._values.get(state, 0.0)
+                self._values[state] += self._alpha * (
+                    reward + self._gamma * self._values[next_state] - self._values[state]
                 )
 
+                if self._replay is not None:
+                    self._replay.add(state, action, reward, next_state, terminals[next_state])
+                    updates += self._replay_step()
+
+                visited.append(state)
                 state = next_state
 
+            self._start_sampler.update(visited)
+
             # If model is available, we can derive the policy from the values. In this simple grid world,
             # we can just check all possible actions and choose the one that leads to the state with the highest value.
-            best_policy = utils.calc_best_policy_from_values(self._env, self._values, self._gamma)
-
-            for state, action in best_policy.items():
-                self._policy[state] = utils.calc_action_probabilities(self._env.actions, action, self._epsilon)
+            best_actions = utils.calc_greedy_actions_from_values(self._env, self._values, self._gamma)
+            self._policy = utils.calc_epsilon_greedy_probabilities(best_actions, len(self._env.actions), self._epsilon)
 
-            iters += i
+            iters += len(visited)
+            updates += len(visited)
+            self._last_return = episode_return
 
-        return iters
+            yield 1, iters, updates
 
     @property
-    def values(self) -> dict[State, float]:
-        """Returns state values."""
+    def table(self) -> np.ndarray:
+        """Returns [S] state values."""
         return self._values
 
-    @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the best action for each state."""
-        return utils.calc_best_policy_from_values(self._env, self._values, self._gamma)
+    def _replay_step(self) -> int:
+        """Applies replayed minibatch updates once enough replay credit is accumulated, returns number of updates."""
+
+        self._replay_credit += self._replay_ratio
+        updates = 0
+
+        while self._replay_credit >= self._replay_batch_size:
+            self._replay_credit -= self._replay_batch_size
+            updates += self._replay_batch_size
 
-    def _get_start_state(self) -> State:
-        """Gets a random non-terminal state to start an episode."""
+            batch = self._replay.sample(self._replay_batch_size)
+            states = batch["state"]
+            targets = batch["reward"] + self._gamma * self._values[batch["next_state"]] * ~batch["done"]
 
-        # We start from a random non-terminal state to ensure that we explore the state space effectively.
-        # If it is allowed by the environment, we could also start from a fixed state or a distribution of states.
+            # All updates of the minibatch are computed from the same values, a duplicated state is updated once.
+            self._values[states] += self._alpha * (targets - self._values[states])
 
-        return (random.randint(0, self._env.size[0] - 1), random.randint(0, self._env.size[1] - 1))
+        return updates
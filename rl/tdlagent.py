@@ -0,0 +1,85 @@
+"""Temporal Difference TD(λ) Agent"""
+
+from typing import Iterator
+
+import numpy as np
+import utils
+from agent import TabularAgent
+from common import EligibilityTraces, TraceType
+from gridworld import GridWorld
+from sampling import StartStateSampler
+
+
+class TemporalDifferenceLambdaAgent(TabularAgent):
+    """TD(λ) agent with eligibility traces to find the optimal policy for a given GridWorld environment."""
+
+    def __init__(
+        self,
+        env: GridWorld,
+        alpha: float = 0.1,
+        gamma: float = 0.99,
+        lambda_: float = 0.9,
+        epsilon: float = 0.25,
+        trace_type: TraceType = TraceType.ACCUMULATING,
+        max_steps: int = 100,
+        max_iters: int = 1000,
+        start_sampler: StartStateSampler | None = None,
+    ) -> None:
+        self._env = env
+        self._alpha = alpha
+        self._gamma = gamma
+        self._lambda = lambda_
+        self._epsilon = epsilon
+        self._max_steps = max_steps
+        self._max_iters = max_iters
+        self._start_sampler = start_sampler or StartStateSampler(env)
+        self._values = np.zeros(env.num_states)
+        self._traces = EligibilityTraces(env.num_states, trace_type)
+
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of finished episodes, iterations and updates after every episode."""
+
+        iters = updates = 0
+        env_step, terminals = self._env.step, self._env.terminal_mask
+
+        for _ in range(self._max_iters):
+            state, _ = self._start_sampler.sample()
+            visited = []
+            episode_return = 0.0
+            self._traces.clear()
+
+            for _ in range(self._max_steps):
+                if terminals[state]:
+                    break
+
+                # If model is available, we can derive the policy from the values: one-step lookahead for the
+                # current state only.
+                action = utils.sample_epsilon_greedy_action(
+                    self._env.calc_action_values(self._values, self._gamma, state), self._epsilon
+                )
+                next_state, reward = env_step(state, action)
+                episode_return += reward
+
+                # δ ← R + γV(S') - V(S), terminal states are never updated, so V(terminal) = 0
+                td_error = reward + self._gamma * self._values[next_state] - self._values[state]
+
+                # V(s) ← V(s) + α · δ · e(s) for all recently visited states
+                self._traces.visit(state, self._alpha)
+                self._traces.update(self._values, self._alpha * td_error)
+                self._traces.decay(self._gamma * self._lambda)
+
+                visited.append(state)
+                state = next_state
+
+            self._start_sampler.update(visited)
+
+            iters += len(visited)
+            updates += len(visited)
+            self._last_return = episode_return
+
+            yield 1, iters, updates
+
+    @property
+    def table(self) -> np.ndarray:
+        """Returns [S] state values."""
+        return self._values
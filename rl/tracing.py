@@ -0,0 +1,165 @@
+"""Convergence traces: per-sweep or per-episode training diagnostics of tabular agents."""
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from agent import TabularAgent
+
+# Packed layout of a trace row. Counters are cumulative over all train calls, length and return are averaged over the
+# episodes since the previous row (NaN for planners).
+TRACE_DTYPE = np.dtype(
+    [
+        ("episodes", np.int64),  # finished episodes, sweeps (policy improvements) for planners
+        ("iterations", np.int64),
+        ("updates", np.int64),
+        ("elapsed", np.float64),  # seconds of training
+        ("residual", np.float64),  # max |max_a Σ p · (r + γ V(s')) - V(s)| over non-terminal states
+        ("changed_states", np.int64),  # states whose value changed since the previous row
+        ("policy_changes", np.int64),  # states whose greedy action changed since the previous row
+        ("length", np.float64),  # mean episode length, evaluation sweeps for planners
+        ("return", np.float64),  # mean undiscounted episode return
+    ]
+)
+
+
+class ConvergenceTrace:
+    """Records diagnostics of agent training into a preallocated TRACE_DTYPE array.
+
+    Agent calls record after every episode (batch of episodes, sweep). Episode length and return are accumulated every
+    time, table diagnostics (Bellman residual against the environment model, changed values and greedy actions) are
+    computed every `every` episodes only: they cost one vectorized backup over all states. The array doubles its
+    capacity when full.
+    """
+
+    def __init__(self, capacity: int = 1024, every: int = 1) -> None:
+        self._rows = np.zeros(max(capacity, 1), dtype=TRACE_DTYPE)
+        self._length = 0
+        self._every = every
+        self._next_row = every
+        self._totals = np.zeros(4)  # episodes, iterations, updates and elapsed of finished train calls
+        self._last = np.zeros(4)  # the same of the current train call
+        self._episodes = 0  # episodes since the previous row
+        self._steps = 0
+        self._return = 0.0
+        self._values: np.ndarray | None = None
+        self._actions: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Returns structured array view of the recorded rows."""
+        return self._rows[: self._length]
+
+    def start(self, agent: "TabularAgent") -> None:
+        """Starts a train call: counters of the previous call are accumulated, reference tables taken if missing."""
+        self._totals += self._last
+        self._last[:] = 0.0
+
+        if self._values is None:
+            self._values, self._actions, _ = self._calc_diagnostics(agent)
+
+    def record(
+        self, agent: "TabularAgent", episodes: int, iterations: int, updates: int, elapsed: float, num_episodes: int
+    ) -> None:
+        """Records finished episodes, adds a row every `every` episodes."""
+        self._episodes += num_episodes
+        self._steps += iterations - int(self._last[1])
+        self._return += agent.last_return
+        self._last[:] = episodes, iterations, updates, elapsed
+
+        if self._totals[0] + episodes < self._next_row:
+            return
+
+        self._next_row = int(self._totals[0]) + episodes + self._every
+        values, actions, residual = self._calc_diagnostics(agent)
+
+        if self._length == len(self._rows):
+            rows = np.zeros(2 * len(self._rows), dtype=TRACE_DTYPE)
+            rows[: self._length] = self._rows[: self._length]
+            self._rows = rows
+
+        totals = self._totals + self._last
+        self._rows[self._length] = (
+            totals[0],
+            totals[1],
+            totals[2],
+            totals[3],
+            residual,
+            np.count_nonzero(values != self._values),
+            np.count_nonzero(actions != self._actions),
+            self._steps / self._episodes,
+            self._return / self._episodes,
+        )
+        self._length += 1
+
+        self._values, self._actions = values, actions
+        self._episodes = self._steps = 0
+        self._return = 0.0
+
+    def save(self, path: str) -> None:
+        """Saves recorded columns to .npz file."""
+        rows = self.rows
+        np.savez(path, **{name: rows[name] for name in TRACE_DTYPE.names})
+
+    @staticmethod
+    def load(path: str) -> np.ndarray:
+        """Returns TRACE_DTYPE rows loaded from .npz file."""
+        with np.load(path) as data:
+            rows = np.zeros(len(data["episodes"]), dtype=TRACE_DTYPE)
+
+            for name in TRACE_DTYPE.names:
+                rows[name] = data[name]
+
+        return rows
+
+    @staticmethod
+    def _calc_diagnostics(agent: "TabularAgent") -> tuple[np.ndarray, np.ndarray, float]:
+        """Returns copy of state values, greedy actions and max Bellman residual of the agent tables."""
+        env, table = agent.env, agent.table
+        values = agent.value_table.copy()
+        action_values = env.calc_action_values(values, agent.gamma)
+        running = ~env.terminal_mask
+
+        # Ties are broken by the first action, so unchanged tables never report policy changes
+        actions = np.argmax(table if table.ndim == 2 else action_values, axis=1)
+        residual = np.max(np.abs(np.max(action_values, axis=1) - values)[running], initial=0.0)
+
+        return values, actions, float(residual)
+
+
+def plot_trace(file_name: str) -> None:
+    """Plots residual, changed states and policy changes, episode length and return of a trace .npz file."""
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel  # optional dependency
+
+    rows = ConvergenceTrace.load(file_name)
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+    fig.suptitle(file_name, fontsize=8)
+
+    ax1.set_ylabel("Bellman residual")
+    ax1.set_yscale("log")
+    ax1.plot(rows["episodes"], np.maximum(rows["residual"], 1e-16), label="residual")
+    ax1.legend(fontsize=8, loc="upper left")
+
+    ax3 = ax1.twinx()
+    ax3.set_ylabel("Changes")
+    ax3.plot(rows["episodes"], rows["changed_states"], color="tab:green", alpha=0.5, label="changed states")
+    ax3.plot(rows["episodes"], rows["policy_changes"], color="tab:red", alpha=0.5, label="policy changes")
+    ax3.legend(fontsize=8, loc="upper right")
+
+    ax2.set_xlabel("Episode")
+    ax2.set_ylabel("Return")
+    ax2.plot(rows["episodes"], rows["return"], alpha=0.4, label="return")
+    ax2.legend(fontsize=8, loc="upper left")
+
+    ax4 = ax2.twinx()
+    ax4.set_ylabel("Length")
+    ax4.plot(rows["episodes"], rows["length"], color="tab:red", alpha=0.5, label="length")
+    ax4.legend(fontsize=8, loc="upper right")
+
+    plt.tight_layout()
+    plt.show()
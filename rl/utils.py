@@ -1,7 +1,7 @@
 """Utils for the GridWorld environment agents."""
 
 import numpy as np
-from common import EpisodeItem
+from common import EPISODE_DTYPE, Episode, EpisodeBatch
 from gridworld import Action, GridWorld, State
 
 
@@ -17,7 +17,9 @@ def format_policy(policy: dict[State, Action], env: GridWorld) -> str:
         for c in range(env.size[1]):
             state = (r, c)
 
-            if env.is_terminal(state):
+            if env.is_wall(state):
+                row.append("#")
+            elif env.is_terminal(state):
                 row.append("T")
             else:
                 row.append(arrows[policy.get(state, Action.UP)])
@@ -130,9 +132,10 @@ def calc_best_policy_from_values(env: GridWorld, values: dict[State, float], gam
         best_value = float("-inf")
 
         for action in env.actions:
-            next_state = env.next_state(state, action)
-            reward = env.reward(state, action, next_state)
-            value = reward + gamma * values.get(next_state, 0.0)
+            value = sum(
+                transition.probability * (transition.reward + gamma * values.get(transition.next_state, 0.0))
+                for transition in env.get_transition(state, action)
+            )
 
             if value > best_value:
                 best_value = value
@@ -174,13 +177,158 @@ def get_action(probabilities: dict[Action, float]) -> Action:
     return Action(np.random.choice(actions, p=probs))
 
 
-def calc_returns(episode: list[EpisodeItem], gamma: float) -> list[float]:
+def sample_action(probabilities: np.ndarray) -> Action:
+    """Selects an action based on [A] array of action probabilities."""
+    index = int(np.searchsorted(np.cumsum(probabilities), np.random.random(), side="right"))
+
+    return Action(min(index, len(probabilities) - 1))
+
+
+def sample_epsilon_greedy_action(action_values: np.ndarray, epsilon: float) -> Action:
+    """Selects an epsilon-greedy action based on [A] array of action values."""
+    if np.random.random() < epsilon:
+        return Action(np.random.randint(len(action_values)))
+
+    # Ties are broken randomly, otherwise untrained (all zero) values would always select the first action.
+    best_actions = np.flatnonzero(action_values == np.max(action_values))
+
+    return Action(int(best_actions[np.random.randint(len(best_actions))]))
+
+
+def softmax(h: np.ndarray) -> np.ndarray:
+    """Numerically stable softmax over the last axis of action preferences."""
+    exp_h = np.exp(h - np.max(h, axis=-1, keepdims=True))
+
+    return exp_h / np.sum(exp_h, axis=-1, keepdims=True)
+
+
+def calc_returns(episode: Episode, gamma: float) -> np.ndarray:
     """Computes discounted returns Gₜ = Σₖ₌ₜ₊₁ᵀ γᵏ⁻ᵗ⁻¹ · Rₖ for each step."""
-    returns = [0.0] * len(episode)
-    g = 0.0
+    return calc_batch_returns(EpisodeBatch(episode.steps[None, :], np.array([len(episode)])), gamma)[0]
+
+
+def calc_epsilon_greedy_probabilities(best_actions: np.ndarray, num_actions: int, epsilon: float) -> np.ndarray:
+    """Vectorized calc_action_probabilities: returns [N, A] epsilon-greedy probabilities for N best actions."""
+    probabilities = np.full((len(best_actions), num_actions), epsilon / num_actions)
+    probabilities[np.arange(len(best_actions)), best_actions] += 1 - epsilon
+
+    return probabilities
+
+
+def calc_greedy_actions(q: np.ndarray) -> np.ndarray:
+    """Returns [N] best action for each row of [N, A] action values, ties are broken randomly."""
+    best = q == np.max(q, axis=1, keepdims=True)
+
+    return np.argmax(np.random.random(q.shape) * best, axis=1)
+
+
+def calc_greedy_actions_from_values(env: GridWorld, values: np.ndarray, gamma: float) -> np.ndarray:
+    """Vectorized calc_best_policy_from_values: returns [S] best action index for each state."""
+    return np.argmax(env.calc_action_values(values, gamma), axis=1)
+
+
+def values_to_dict(values: np.ndarray, env: GridWorld) -> dict[State, float]:
+    """Converts [S] values array to a state values dict."""
+    return {env.index_state(i): float(v) for i, v in enumerate(values)}
+
+
+def values_to_array(values: dict[State, float], env: GridWorld) -> np.ndarray:
+    """Converts a state values dict to [S] values array."""
+    array = np.zeros(env.num_states)
+
+    for state, value in values.items():
+        array[env.state_index(state)] = value
 
-    for t in reversed(range(len(episode))):
-        g = episode[t].reward + gamma * g
-        returns[t] = g
+    return array
+
+
+def quality_to_dict(q: np.ndarray, env: GridWorld) -> dict[State, dict[Action, float]]:
+    """Converts [S, A] quality array to a quality dict of non-terminal states."""
+    return {
+        env.index_state(i): {action: float(q[i, action]) for action in env.actions}
+        for i in np.flatnonzero(~env.terminal_mask)
+    }
+
+
+def actions_to_policy(actions: np.ndarray, env: GridWorld) -> dict[State, Action]:
+    """Converts [S] action indices array to a policy dict of non-terminal states."""
+    return {env.index_state(i): Action(int(actions[i])) for i in np.flatnonzero(~env.terminal_mask)}
+
+
+def generate_episodes(
+    env: GridWorld,
+    probabilities: np.ndarray,
+    num_episodes: int,
+    max_steps: int,
+    start_states: np.ndarray | None = None,
+    start_actions: np.ndarray | None = None,
+) -> EpisodeBatch:
+    """Rolls out a batch of episodes at once following [S, A] action probabilities.
+
+    All episodes advance in lockstep: each step samples actions for the still running episodes with one inverse CDF
+    lookup and samples their transitions with environment alias tables. Non-negative start actions replace the policy
+    action at the first step (exploring starts).
+    """
+    terminals = env.terminal_mask
+    cum_probabilities = np.cumsum(probabilities, axis=1)
+    max_action = probabilities.shape[1] - 1
+
+    if start_states is None:
+        start_states = np.random.randint(0, env.num_states, size=num_episodes)
+
+    states = np.asarray(start_states, dtype=np.int32)
+    steps = np.zeros((num_episodes, max_steps), dtype=EPISODE_DTYPE)
+    lengths = np.zeros(num_episodes, dtype=np.int32)
+    running = np.flatnonzero(~terminals[states])
+
+    for t in range(max_steps):
+        if running.size == 0:
+            break
+
+        cur_states = states[running]
+        u = np.random.random(running.size)[:, None]
+        # min() guards against rounding errors when cumulative probabilities sum slightly below 1.0
+        actions = np.minimum((u >= cum_probabilities[cur_states]).sum(axis=1), max_action)
+
+        if t == 0 and start_actions is not None:
+            actions = np.where(start_actions[running] >= 0, start_actions[running], actions)
+
+        steps["state"][running, t] = cur_states
+        steps["action"][running, t] = actions
+        next_states, rewards = env.sample_transitions(cur_states, actions)
+        steps["reward"][running, t] = rewards
+
+        lengths[running] += 1
+        states[running] = next_states
+        running = running[~terminals[states[running]]]
+
+    return EpisodeBatch(steps[:, : max(int(lengths.max(initial=0)), 1)], lengths)
+
+
+def calc_batch_returns(batch: EpisodeBatch, gamma: float) -> np.ndarray:
+    """Computes [B, T] discounted returns Gₜ = Rₜ₊₁ + γ · Gₜ₊₁ for a batch of episodes.
+
+    The reverse scan runs over the time axis only, every step is a single array operation for the whole batch. Padded
+    steps have zero reward, so they do not leak into returns of shorter episodes.
+    """
+    rewards = batch.rewards
+    returns = np.zeros(rewards.shape)
+    g = np.zeros(rewards.shape[0])
+
+    for t in reversed(range(rewards.shape[1])):
+        g = rewards[:, t] + gamma * g
+        returns[:, t] = g
 
     return returns
+
+
+def calc_first_visit_mask(keys: np.ndarray, mask: np.ndarray, num_keys: int) -> np.ndarray:
+    """Returns [B, T] boolean array marking first occurrence of each key (e.g. state or state-action) per episode."""
+    episode_keys = (np.arange(keys.shape[0])[:, None] * num_keys + keys)[mask]
+    positions = np.flatnonzero(mask)
+    _, first = np.unique(episode_keys, return_index=True)
+
+    first_visits = np.zeros(mask.shape, dtype=bool)
+    first_visits.flat[positions[first]] = True
+
+    return first_visits
@@ -1,13 +1,17 @@
 """Value Iteration Agent for GridWorld environment."""
 
-from collections import defaultdict
+from typing import Iterator
 
-from gridworld import Action, GridWorld, State
+import numpy as np
+from agent import TabularAgent
+from gridworld import GridWorld
 
 
-class ValueIterationAgent:
+class ValueIterationAgent(TabularAgent):
     """Value iteration agent to find the optimal policy for a given GridWorld environment."""
 
+    is_planner = True
+
     def __init__(
         self,
         env: GridWorld,
@@ -19,14 +23,14 @@ class ValueIterationAgent:
         self._gamma = gamma
         self._theta = theta
         self._max_iters = max_iters
-        self._values: dict[State, float] = defaultdict(float)
+        self._values = np.zeros(env.num_states)
 
-    def train(self) -> int:
-        """Trains agent."""
+    def _train_episodes(self) -> Iterator[tuple[int, int, int]]:
+        """Trains agent, yields number of sweeps, iterations and state backups after every sweep over the states."""
 
         # calculate values
 
-        i = 0
+        updates = 0
 
         for i in range(self._max_iters):
             delta = 0.0
@@ -51,30 +55,32 @@ class ValueIterationAgent:
 
                     for transition in self._env.get_transition(state, action):
                         value += transition.probability * (
-                            transition.reward + self._gamma * self._values[transition.next_state]
+                            transition.reward
+                            + self._gamma * self._values[self._env.state_index(transition.next_state)]
                         )
 
                     best_value = max(best_value, value)
 
-                delta = max(delta, abs(self._values[state] - best_value))
-                self._values[state] = best_value
+                index = self._env.state_index(state)
+                delta = max(delta, abs(self._values[index] - best_value))
+                self._values[index] = best_value
+                updates += 1
+
+            yield 1, i + 1, updates
 
             if delta < self._theta:
                 break
 
-        return i + 1
-
     @property
-    def values(self) -> dict[State, float]:
-        """Returns state values."""
-        return dict(self._values)
+    def table(self) -> np.ndarray:
+        """Returns [S] state values."""
+        return self._values
 
-    @property
-    def policy(self) -> dict[State, Action]:
-        """Returns the best policy based on the calculated state values."""
+    def _calc_greedy_actions(self) -> np.ndarray:
+        """Computes [S] best action index of each state based on the calculated state values."""
         # calculate policy
 
-        policy: dict[State, Action] = {}
+        actions = np.zeros(self._env.num_states, dtype=np.int64)
 
         for state in self._env.states:
             if self._env.is_terminal(state):
@@ -101,13 +107,13 @@ class ValueIterationAgent:
 
                 for transition in self._env.get_transition(state, action):
                     value += transition.probability * (
-                        transition.reward + self._gamma * self._values[transition.next_state]
+                        transition.reward + self._gamma * self._values[self._env.state_index(transition.next_state)]
                     )
 
                 if value > best_value:
                     best_value = value
                     best_action = action
 
-            policy[state] = best_action
+            actions[self._env.state_index(state)] = best_action
 
-        return policy
+        return actions